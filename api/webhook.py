@@ -12,45 +12,10 @@ from urllib.parse import parse_qs
 # Add parent directory to path
 sys.path.insert(0, '..')
 
-from telegram import Update
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    CallbackQueryHandler,
-    MessageHandler,
-    ConversationHandler,
-    filters
-)
-
 from config import config
-from bot.handlers.main import start_command, help_command, main_menu_callback, help_callback
-from bot.handlers.search import (
-    search_inn_callback,
-    search_ogrn_callback,
-    handle_inn_input,
-    handle_ogrn_input,
-    cancel_handler,
-    AWAITING_INN,
-    AWAITING_OGRN
-)
-from bot.handlers.company import (
-    show_company_callback,
-    show_finances_callback,
-    show_requisites_callback,
-    show_address_callback,
-    show_directors_callback,
-    show_founders_callback,
-    show_addresses_history_callback,
-    show_okved_callback,
-    show_history_menu_callback,
-    show_export_menu_callback
-)
-from bot.handlers.export import export_screen_callback, export_full_callback
-from bot.handlers.external import (
-    show_court_cases_callback,
-    show_procurement_callback,
-    handle_pagination
-)
+from bot.application import create_application
+from bot.runtime import BotRuntime, parse_update, verify_secret_token
+from bot.services.resilience import health_status
 
 # Configure logging
 logging.basicConfig(
@@ -59,114 +24,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global application instance
-application = None
+# Persistent event loop and initialized Application shared across invocations
+runtime = BotRuntime(create_application)
 
 
-def get_application():
-    """Get or create application instance."""
-    global application
+class handler(BaseHTTPRequestHandler):
+    """Vercel serverless function handler."""
     
-    if application is None:
-        # Validate config
-        config.validate()
-        
-        # Create application
-        application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
-        
-        # Add conversation handler for search
-        conv_handler = ConversationHandler(
-            entry_points=[
-                CallbackQueryHandler(search_inn_callback, pattern='^search_inn$'),
-                CallbackQueryHandler(search_ogrn_callback, pattern='^search_ogrn$'),
-            ],
-            states={
-                AWAITING_INN: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_inn_input)],
-                AWAITING_OGRN: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_ogrn_input)],
-            },
-            fallbacks=[CommandHandler('cancel', cancel_handler)],
-        )
-        
-        application.add_handler(conv_handler)
-        
-        # Add command handlers
-        application.add_handler(CommandHandler('start', start_command))
-        application.add_handler(CommandHandler('help', help_command))
-        
-        # Add callback query handlers
-        application.add_handler(CallbackQueryHandler(main_menu_callback, pattern='^main_menu$'))
-        application.add_handler(CallbackQueryHandler(help_callback, pattern='^help$'))
-        
-        # Company screens
-        application.add_handler(CallbackQueryHandler(show_company_callback, pattern='^company:'))
-        application.add_handler(CallbackQueryHandler(show_company_callback, pattern='^brief:'))
-        application.add_handler(CallbackQueryHandler(show_finances_callback, pattern='^finances:'))
-        application.add_handler(CallbackQueryHandler(show_requisites_callback, pattern='^requisites:'))
-        application.add_handler(CallbackQueryHandler(show_address_callback, pattern='^address:'))
-        application.add_handler(CallbackQueryHandler(show_history_menu_callback, pattern='^history:'))
+    def _send_json(self, status: int, payload: dict):
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+    
+    def do_POST(self):
+        """Handle POST request from Telegram."""
+        if not verify_secret_token(self.headers.get('X-Telegram-Bot-Api-Secret-Token')):
+            logger.warning("Rejected webhook with invalid secret token")
+            self._send_json(403, {'ok': False, 'error': 'forbidden'})
+            return
         
-        # History sub-screens
-        application.add_handler(CallbackQueryHandler(show_directors_callback, pattern='^directors:'))
-        application.add_handler(CallbackQueryHandler(show_founders_callback, pattern='^founders:'))
-        application.add_handler(CallbackQueryHandler(show_addresses_history_callback, pattern='^addresses_history:'))
-        application.add_handler(CallbackQueryHandler(show_okved_callback, pattern='^okved:'))
+        # Read request body
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(content_length)
         
-        # External modules
-        application.add_handler(CallbackQueryHandler(show_court_cases_callback, pattern='^court:'))
-        application.add_handler(CallbackQueryHandler(show_procurement_callback, pattern='^procurement:'))
+        logger.info(f"Received webhook: {body[:200].decode('utf-8', errors='replace')}")
         
-        # Pagination
-        application.add_handler(CallbackQueryHandler(handle_pagination, pattern='^(court|procurement):(next|prev):'))
+        update_data = parse_update(body)
+        if update_data is None:
+            self._send_json(400, {'ok': False, 'error': 'invalid update'})
+            return
         
-        # Export
-        application.add_handler(CallbackQueryHandler(show_export_menu_callback, pattern='^export_menu:'))
-        application.add_handler(CallbackQueryHandler(export_screen_callback, pattern='^export_screen:'))
-        application.add_handler(CallbackQueryHandler(export_full_callback, pattern='^export_full:'))
+        # Process (or enqueue) the update on the persistent loop
+        if not runtime.run(runtime.handle_update(update_data)):
+            # Queue is full; Telegram redelivers the update later
+            self._send_json(503, {'ok': False, 'error': 'queue full'})
+            return
         
-        logger.info("Application initialized")
-    
-    return application
-
-
-class handler(BaseHTTPRequestHandler):
-    """Vercel serverless function handler."""
-    
-    def do_POST(self):
-        """Handle POST request from Telegram."""
-        try:
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
-            
-            logger.info(f"Received webhook: {body[:200]}")
-            
-            # Parse update
-            update_data = json.loads(body)
-            update = Update.de_json(update_data, get_application().bot)
-            
-            # Process update
-            import asyncio
-            asyncio.run(get_application().process_update(update))
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'ok': True}).encode())
-            
-        except Exception as e:
-            logger.error(f"Error processing webhook: {e}", exc_info=True)
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'ok': False, 'error': str(e)}).encode())
+        self._send_json(200, {'ok': True})
     
     def do_GET(self):
         """Handle GET request (health check)."""
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps({
-            'status': 'ok',
-            'message': 'Telegram Bot Webhook is running'
-        }).encode())
+        self._send_json(200, {
+            **health_status(),
+            'message': 'Telegram Bot Webhook is running',
+            'mode': config.WEBHOOK_MODE
+        })
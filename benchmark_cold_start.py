@@ -0,0 +1,197 @@
+"""
+Cold-start benchmark.
+
+Starts a fresh interpreter per scenario, imports the webhook entry point
+and processes one update, reporting:
+
+- import time of api.webhook (what a new serverless instance pays first)
+- time to first response: from receiving the update to the first Bot API
+  request the bot sends back (initialization included)
+- total processing time of the update
+
+Telegram and DaData are replaced with canned in-process responses, so no
+network access or real API keys are needed.
+
+Usage:
+    python benchmark_cold_start.py [--runs N] [--budget-ms MS]
+
+Exits with status 1 when the median import time exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+INN = '7707083893'
+
+SCENARIOS = {
+    'import': None,
+    'start': {'message': '/start'},
+    'help': {'callback': 'help'},
+    'company': {'callback': f'company:{INN}'},
+    'export': {'callback': f'export_screen:{INN}:main'},
+}
+
+DEFAULT_IMPORT_BUDGET_MS = 600
+
+# Requests made while initializing, not in reply to the update
+_INIT_ENDPOINTS = {'getMe'}
+
+_CANNED_COMPANY = {
+    'value': 'ПАО СБЕРБАНК',
+    'data': {
+        'inn': INN,
+        'ogrn': '1027700132195',
+        'kpp': '773601001',
+        'name': {'full_with_opf': 'ПУБЛИЧНОЕ АКЦИОНЕРНОЕ ОБЩЕСТВО "СБЕРБАНК РОССИИ"',
+                 'short_with_opf': 'ПАО СБЕРБАНК'},
+        'state': {'status': 'ACTIVE', 'registration_date': 677376000000},
+        'management': {'name': 'Греф Герман Оскарович', 'post': 'ПРЕЗИДЕНТ'},
+        'address': {'value': 'г Москва, ул Вавилова, д 19'},
+    },
+}
+
+
+def _build_update(scenario: dict) -> dict:
+    user = {'id': 1, 'is_bot': False, 'first_name': 'Bench'}
+    chat = {'id': 1, 'type': 'private'}
+    if 'message' in scenario:
+        text = scenario['message']
+        return {
+            'update_id': 1,
+            'message': {
+                'message_id': 1, 'date': int(time.time()), 'chat': chat, 'from': user, 'text': text,
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text)}],
+            },
+        }
+    return {
+        'update_id': 1,
+        'callback_query': {
+            'id': '1', 'from': user, 'chat_instance': '1', 'data': scenario['callback'],
+            'message': {'message_id': 1, 'date': int(time.time()), 'chat': chat, 'text': 'menu'},
+        },
+    }
+
+
+def run_scenario(name: str) -> dict:
+    """Run one scenario in this (fresh) process and return timings in ms."""
+    started = time.perf_counter()
+    import api.webhook
+    import_ms = (time.perf_counter() - started) * 1000
+
+    result = {'scenario': name, 'import_ms': import_ms}
+    scenario = SCENARIOS[name]
+    if scenario is None:
+        return result
+
+    import telegram
+    from bot.services.mcp_dadata import mcp_dadata_service
+
+    first_response = []
+
+    async def fake_post(self, endpoint, data=None, *args, **kwargs):
+        if endpoint not in _INIT_ENDPOINTS and not first_response:
+            first_response.append(time.perf_counter())
+        if endpoint == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+        if endpoint.startswith(('send', 'edit')):
+            return {'message_id': 2, 'date': int(time.time()), 'chat': {'id': 1, 'type': 'private'}}
+        return True
+
+    async def fake_find_by_id(query, timeout=None):
+        return _CANNED_COMPANY
+
+    telegram.Bot._do_post = fake_post
+    mcp_dadata_service._find_by_id = fake_find_by_id
+
+    runtime = api.webhook.runtime
+    received = time.perf_counter()
+    runtime.run(runtime.handle_update(_build_update(scenario)))
+    done = time.perf_counter()
+
+    result['first_response_ms'] = (first_response[0] - received) * 1000 if first_response else None
+    result['total_ms'] = (done - received) * 1000
+    return result
+
+
+def _child_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    # Placeholders satisfy config.validate(); no request leaves the process
+    for key in ('TELEGRAM_BOT_TOKEN', 'OPENAI_API_KEY', 'OPENAI_ASSISTANT_ID', 'DADATA_API_KEY'):
+        env.setdefault(key, '1:bench' if key == 'TELEGRAM_BOT_TOKEN' else 'bench')
+    env.update(
+        REDIS_URL='',
+        WEBHOOK_MODE='sync',
+        TELEGRAM_WEBHOOK_SECRET='',
+        ASSISTANT_SCREENS='',
+        SQLITE_PATH=os.path.join(workdir, 'bench.sqlite3'),
+        LOG_LEVEL='WARNING',
+    )
+    return env
+
+
+def _run_child(name: str) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--scenario', name],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=_child_env(workdir),
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Scenario '{name}' failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def _fmt(value) -> str:
+    return f"{value:8.1f}" if value is not None else "       -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='fresh processes per scenario (default: 3)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help=f'import time budget of api.webhook in ms (default: {DEFAULT_IMPORT_BUDGET_MS})')
+    parser.add_argument('--scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        # Child process: print timings as the last stdout line
+        print(json.dumps(run_scenario(args.scenario)))
+        return
+
+    print("=" * 60)
+    print(f"Cold start benchmark (median of {args.runs} runs, ms)")
+    print("=" * 60)
+    print(f"{'scenario':<10} {'import':>8} {'first':>8} {'total':>8}")
+
+    import_times = []
+    for name in SCENARIOS:
+        runs = [_run_child(name) for _ in range(args.runs)]
+        import_times.extend(run['import_ms'] for run in runs)
+        print(
+            f"{name:<10} {_fmt(_median(r['import_ms'] for r in runs))}"
+            f" {_fmt(_median(r.get('first_response_ms') for r in runs))}"
+            f" {_fmt(_median(r.get('total_ms') for r in runs))}"
+        )
+
+    import_ms = _median(import_times)
+    print()
+    if import_ms > args.budget_ms:
+        print(f"❌ Import time {import_ms:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"✅ Import time {import_ms:.0f} ms within budget of {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Telegram Application factory shared by all webhook entry points."""
+import logging
+
+from telegram import Update
+from telegram.ext import (
+    Application,
+    CommandHandler,
+    CallbackQueryHandler,
+    MessageHandler,
+    TypeHandler,
+    filters
+)
+
+from config import config
+from bot.flood_limiter import flood_limiter
+from bot.services.persistence import create_persistence
+from bot.handlers.rate_limit import rate_limit_handler
+from bot.handlers.router import CallbackRouter
+from bot.handlers import company, export, external, main, search
+from bot.handlers.main import start_command, help_command
+from bot.handlers.search import handle_search_input, cancel_handler
+
+# Callback routes declared by handler modules
+callback_router = CallbackRouter()
+for module in (main, search, company, external, export):
+    callback_router.include(module.ROUTES)
+
+logger = logging.getLogger(__name__)
+
+
+def create_application() -> Application:
+    """Build Application with all bot handlers registered."""
+    # Validate config
+    config.validate()
+    
+    # Create application (webhook mode, no polling updater); outgoing
+    # requests go through the flood limiter
+    builder = (
+        Application.builder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .updater(None)
+        .rate_limiter(flood_limiter)
+    )
+    persistence = create_persistence()
+    if persistence is not None:
+        builder.persistence(persistence)
+    application = builder.build()
+    
+    # Rate limiting runs first and stops over-limit updates
+    application.add_handler(TypeHandler(Update, rate_limit_handler), group=-1)
+    
+    # Search input, routed by user_data['state'] (shared across instances)
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_search_input))
+    
+    # Add command handlers
+    application.add_handler(CommandHandler('start', start_command))
+    application.add_handler(CommandHandler('help', help_command))
+    application.add_handler(CommandHandler('cancel', cancel_handler))
+    
+    # All callback queries: one router, dict lookup by prefix
+    application.add_handler(CallbackQueryHandler(callback_router.dispatch))
+    
+    logger.info("Application created")
+    return application
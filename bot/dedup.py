@@ -0,0 +1,76 @@
+"""Idempotency filter for redelivered Telegram updates."""
+import logging
+from collections import OrderedDict
+from typing import Any, Dict
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """
+    Drop updates whose update_id was already accepted.
+
+    Recent ids are kept in a bounded in-process window; with Redis
+    configured, `SET NX` on a short-lived key extends the check across
+    instances. Redis errors fail open so updates are never lost.
+    """
+
+    def __init__(self, window: int = 10000, ttl: int = 3600):
+        """Initialize deduplicator."""
+        self.window = window
+        self.ttl = ttl
+        self._seen: OrderedDict = OrderedDict()
+
+        self.stats = {
+            'checked': 0,
+            'duplicates': 0,
+            'redis_duplicates': 0,
+            'redis_errors': 0,
+        }
+
+    def _key(self, update_id: int) -> str:
+        return f"dedup:update:{update_id}"
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Check update id and mark it as seen."""
+        self.stats['checked'] += 1
+
+        if update_id in self._seen:
+            self.stats['duplicates'] += 1
+            return True
+        self._seen[update_id] = None
+        while len(self._seen) > self.window:
+            self._seen.popitem(last=False)
+
+        redis = get_redis()
+        if redis is None:
+            return False
+
+        try:
+            if not await redis.set(self._key(update_id), 1, nx=True, ex=self.ttl):
+                self.stats['duplicates'] += 1
+                self.stats['redis_duplicates'] += 1
+                return True
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            logger.warning(f"Redis dedup check failed for update {update_id}: {e}")
+
+        return False
+
+    async def forget(self, update_id: int):
+        """Unmark update id so a redelivery is processed (e.g. after rejecting it)."""
+        self._seen.pop(update_id, None)
+
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._key(update_id))
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            logger.warning(f"Redis dedup release failed for update {update_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get deduplication counters."""
+        return {**self.stats, 'window_size': len(self._seen)}
@@ -0,0 +1,137 @@
+"""In-process update queue with per-chat ordered worker pool."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def get_chat_key(update_data: Dict[str, Any]) -> int:
+    """
+    Get ordering key for a raw update.
+
+    Uses the chat id when the update has a message, then the sender id,
+    and falls back to update_id for updates without either.
+    """
+    for value in update_data.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat and 'id' in chat:
+            return chat['id']
+        sender = value.get('from') or value.get('user')
+        if sender and 'id' in sender:
+            return sender['id']
+    return update_data.get('update_id', 0)
+
+
+class UpdateDispatcher:
+    """
+    Queue updates and process them with a pool of worker coroutines.
+
+    Each worker owns one bounded queue and updates are sharded by chat,
+    so updates of the same chat are processed in arrival order. When a
+    shard is full, submit() waits up to `put_timeout` seconds and then
+    rejects the update, letting the caller signal backpressure.
+    """
+
+    def __init__(self, process: Callable[[Dict[str, Any]], Awaitable[None]],
+                 workers: int = 8, max_queue: int = 1000, put_timeout: float = 1.0):
+        """Initialize dispatcher."""
+        self._process = process
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+
+        self.stats = {
+            'enqueued': 0,
+            'processed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Create queues and worker tasks on the running loop."""
+        if self.running:
+            return
+        shard_size = max(1, self.max_queue // self.workers)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(queue), name=f'update-worker-{i}')
+            for i, queue in enumerate(self._queues)
+        ]
+        logger.info(f"Started {self.workers} update workers (queue size {self.max_queue})")
+
+    async def submit(self, update_data: Dict[str, Any]) -> bool:
+        """
+        Enqueue update for processing.
+
+        Returns:
+            False if the queue stayed full for `put_timeout` seconds
+        """
+        if not self.running:
+            self.start()
+
+        queue = self._queues[hash(get_chat_key(update_data)) % self.workers]
+        try:
+            await asyncio.wait_for(queue.put((time.monotonic(), update_data)), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            logger.warning(f"Update queue full, rejecting update {update_data.get('update_id')}")
+            return False
+
+        self.stats['enqueued'] += 1
+        return True
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            enqueued_at, update_data = await queue.get()
+            wait = time.monotonic() - enqueued_at
+            self.stats['wait_seconds'] += wait
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], wait)
+            try:
+                await self._process(update_data)
+                self.stats['processed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Error processing update {update_data.get('update_id')}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def stop(self, timeout: Optional[float] = 10.0):
+        """Drain queued updates (up to `timeout` seconds) and stop workers."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Update queue not drained in {timeout}s, dropping {self.depth} updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    @property
+    def depth(self) -> int:
+        """Number of queued updates."""
+        return sum(q.qsize() for q in self._queues)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue metrics."""
+        done = self.stats['processed'] + self.stats['failed']
+        return {
+            **self.stats,
+            'depth': self.depth,
+            'workers': self.workers,
+            'avg_wait_ms': round(self.stats['wait_seconds'] / done * 1000, 1) if done else 0.0,
+        }
@@ -0,0 +1,233 @@
+"""Outbound Telegram Bot API scheduler honoring flood limits."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Requests that send or change messages; everything else (answerCallbackQuery,
+# getMe, getFile, ...) passes through unthrottled
+_THROTTLED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+_UNTHROTTLED_ENDPOINTS = {'sendChatAction'}
+# Edits where only the latest pending text matters
+_COALESCED_ENDPOINTS = {'editMessageText', 'editMessageCaption', 'editMessageReplyMarkup'}
+
+# Tells a waiting edit that its leader gave up and it must send itself
+_RESEND = object()
+
+
+class _Pacer:
+    """
+    Generic cell rate algorithm: `rate` requests per second with bursts
+    of up to `burst` requests. Slots are reserved in call order.
+    """
+
+    __slots__ = ('interval', 'tolerance', 'tat')
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.tolerance = self.interval * (max(1, burst) - 1)
+        self.tat = 0.0
+
+    def reserve(self) -> float:
+        """Reserve next slot and return seconds to wait for it."""
+        now = time.monotonic()
+        tat = max(self.tat, now)
+        self.tat = tat + self.interval
+        return max(0.0, tat - self.tolerance - now)
+
+    def pause(self, seconds: float):
+        """Hold all slots (including the burst allowance) for `seconds`."""
+        self.tat = max(self.tat, time.monotonic() + seconds + self.tolerance)
+
+    @property
+    def idle(self) -> bool:
+        return self.tat <= time.monotonic()
+
+
+class FloodLimiter(BaseRateLimiter[None]):
+    """
+    Throttle outgoing messages globally and per chat.
+
+    Message requests wait for a per-chat slot (private chats and groups
+    have separate rates) and then a global slot. RetryAfter responses
+    pause the chat and are retried up to `max_retries` times. Edits of
+    the same message are coalesced: when a newer edit arrives while an
+    older one is still waiting, the older one is dropped and reported as
+    successful. The first pending edit of a message holds its place in
+    the queue and sends the newest text when its slot comes.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: int = 3,
+                 group_rate: float = 20 / 60, max_retries: int = 3, max_chats: int = 10000):
+        """Initialize limiter."""
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+
+        self._global = _Pacer(global_rate, burst=int(global_rate))
+        self._chats: OrderedDict = OrderedDict()
+        self._pending_edits: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+        self.stats = {
+            'requests': 0,
+            'delayed': 0,
+            'delay_seconds': 0.0,
+            'coalesced_edits': 0,
+            'retries': 0,
+        }
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+        self._pending_edits.clear()
+
+    def _get_chat_pacer(self, chat_id: Union[int, str]) -> _Pacer:
+        pacer = self._chats.get(chat_id)
+        if pacer is None:
+            # Group and channel ids are negative
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            pacer = _Pacer(self.group_rate if is_group else self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = pacer
+            if len(self._chats) > self.max_chats:
+                for key in [key for key, p in self._chats.items() if p.idle]:
+                    del self._chats[key]
+        self._chats.move_to_end(chat_id)
+        return pacer
+
+    async def _wait(self, pacer: _Pacer):
+        delay = pacer.reserve()
+        if delay > 0:
+            self.stats['delayed'] += 1
+            self.stats['delay_seconds'] += delay
+            await asyncio.sleep(delay)
+
+    async def _wait_for_slot(self, chat_pacer: Optional[_Pacer]):
+        if chat_pacer is not None:
+            await self._wait(chat_pacer)
+        await self._wait(self._global)
+
+    def _edit_key(self, endpoint: str, data: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        if endpoint not in _COALESCED_ENDPOINTS:
+            return None
+        if data.get('inline_message_id'):
+            return (endpoint, data['inline_message_id'])
+        if data.get('chat_id') is not None and data.get('message_id') is not None:
+            return (endpoint, data['chat_id'], data['message_id'])
+        return None
+
+    async def _send(self, callback, args, kwargs, endpoint: str, chat_id,
+                    chat_pacer: Optional[_Pacer], slot_taken: bool = False):
+        """Send request, waiting for a slot and retrying on RetryAfter."""
+        for attempt in range(self.max_retries + 1):
+            if attempt or not slot_taken:
+                await self._wait_for_slot(chat_pacer)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after
+                if hasattr(retry_after, 'total_seconds'):
+                    retry_after = retry_after.total_seconds()
+                self.stats['retries'] += 1
+                logger.warning(f"Flood limit on {endpoint} for chat {chat_id}, retrying in {retry_after}s")
+                if chat_pacer is not None:
+                    chat_pacer.pause(retry_after)
+                else:
+                    await asyncio.sleep(retry_after)
+
+    async def _send_edit(self, key, callback, args, kwargs, endpoint: str, chat_id,
+                         chat_pacer: Optional[_Pacer]):
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            # An older edit is waiting for its slot: hand it our text and wait
+            if pending['waiter'] is not None and not pending['waiter'].done():
+                pending['waiter'].set_result(True)
+            self.stats['coalesced_edits'] += 1
+            waiter = asyncio.get_running_loop().create_future()
+            pending.update(args=args, kwargs=kwargs, waiter=waiter)
+            result = await waiter
+            if result is _RESEND:
+                return await self._send_edit(key, callback, args, kwargs, endpoint, chat_id, chat_pacer)
+            return result
+
+        pending = {'args': args, 'kwargs': kwargs, 'waiter': None}
+        self._pending_edits[key] = pending
+        try:
+            await self._wait_for_slot(chat_pacer)
+        except BaseException:
+            # Cancelled while waiting: the newest edit has to send itself
+            del self._pending_edits[key]
+            if pending['waiter'] is not None and not pending['waiter'].done():
+                pending['waiter'].set_result(_RESEND)
+            raise
+        del self._pending_edits[key]
+        waiter = pending['waiter']
+
+        try:
+            result = await self._send(
+                callback, pending['args'], pending['kwargs'], endpoint, chat_id, chat_pacer, slot_taken=True
+            )
+        except Exception as e:
+            if waiter is None:
+                raise
+            if not waiter.done():
+                waiter.set_exception(e)
+            return True
+
+        if waiter is None:
+            return result
+        if not waiter.done():
+            waiter.set_result(result)
+        return True
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], list]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[None],
+    ) -> Union[bool, Dict[str, Any], list]:
+        """Wait for chat and global slots, then send the request."""
+        if not endpoint.startswith(_THROTTLED_PREFIXES) or endpoint in _UNTHROTTLED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+
+        self.stats['requests'] += 1
+        chat_id = data.get('chat_id')
+        chat_pacer = self._get_chat_pacer(chat_id) if chat_id is not None else None
+
+        key = self._edit_key(endpoint, data)
+        if key is None:
+            return await self._send(callback, args, kwargs, endpoint, chat_id, chat_pacer)
+        return await self._send_edit(key, callback, args, kwargs, endpoint, chat_id, chat_pacer)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler metrics."""
+        return {
+            **self.stats,
+            'chats': len(self._chats),
+            'pending_edits': len(self._pending_edits),
+        }
+
+
+# Global limiter instance
+flood_limiter = FloodLimiter(
+    global_rate=config.TELEGRAM_GLOBAL_RATE,
+    chat_rate=config.TELEGRAM_CHAT_RATE,
+    chat_burst=config.TELEGRAM_CHAT_BURST,
+    group_rate=config.TELEGRAM_GROUP_RATE_PER_MINUTE / 60,
+    max_retries=config.TELEGRAM_MAX_RETRIES
+)
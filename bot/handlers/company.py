@@ -1,9 +1,14 @@
-"""Company screen handlers using OpenAI Assistant."""
+"""Company screen handlers."""
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from bot.services.assistant import assistant_service
+from config import config
 from bot.services.mcp_dadata import mcp_dadata_service
+from bot.services.prefetch import prefetcher
+from bot.services.singleflight import create_single_flight
+from bot.handlers.router import Arg, CallbackRoute, inn_arg, screen_arg
+from bot.utils.formatters import render_screen
+from bot.utils.streaming import ProgressiveEditor
 from bot.utils.keyboards import (
     get_company_menu_keyboard,
     get_back_keyboard,
@@ -13,21 +18,54 @@ from bot.utils.keyboards import (
 
 logger = logging.getLogger(__name__)
 
+# Identical assistant screens are rendered once per user: the run uses the
+# user's own assistant thread, so its answer must not reach other users
+screen_flight = create_single_flight('screen')
+
+
+async def get_company(context: ContextTypes.DEFAULT_TYPE, inn: str):
+    """Company of INN: the one in user_data if it is this INN, else from DaData."""
+    company_data = context.user_data.get('company')
+    if not company_data or company_data.get('data', {}).get('inn') != inn:
+        company_data = await mcp_dadata_service.find_by_inn(inn)
+    return company_data
+
+
+async def _show_screen(query, user_id: int, screen_type: str, company_data, inn: str, reply_markup):
+    """
+    Show company screen in the callback message.
+    
+    Screens are rendered locally from DaData data unless listed in
+    ASSISTANT_SCREENS, in which case the OpenAI Assistant output is
+    streamed into the message as it arrives.
+    """
+    if screen_type not in config.ASSISTANT_SCREENS or not company_data:
+        await query.edit_message_text(
+            render_screen(screen_type, company_data),
+            parse_mode='HTML',
+            reply_markup=reply_markup
+        )
+        return
+    
+    # Loaded on first use: importing the OpenAI client is slow
+    from bot.services.assistant import assistant_service
+    
+    # Only the caller that starts the run streams; coalesced callers get the final text
+    editor = ProgressiveEditor(query.edit_message_text, interval=config.STREAM_EDIT_INTERVAL)
+    message = await screen_flight.do(
+        f"{user_id}:{screen_type}:{inn}",
+        lambda: assistant_service.format_screen(user_id, screen_type, company_data, on_progress=editor.update)
+    )
+    await editor.finish(message, reply_markup=reply_markup)
+
 
-async def show_company_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_company_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show main company info."""
     query = update.callback_query
     await query.answer()
     
-    # Extract INN from callback data
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
     # Get company data from MCP DaData
-    company_data = mcp_dadata_service.find_by_inn(inn)
+    company_data = await mcp_dadata_service.find_by_inn(inn)
     
     if not company_data:
         await query.edit_message_text("❌ Компания не найдена")
@@ -37,162 +75,104 @@ async def show_company_callback(update: Update, context: ContextTypes.DEFAULT_TY
     context.user_data['company'] = company_data
     context.user_data['inn'] = inn
     
-    # Format using Assistant
-    user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'brief', company_data)
+    # Courts and procurement load in background while the card is read
+    prefetcher.schedule(inn, company_data)
     
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_company_menu_keyboard(inn)
-    )
+    # Format screen
+    user_id = update.effective_user.id
+    await _show_screen(query, user_id, 'brief', company_data, inn, get_company_menu_keyboard(inn))
 
 
-async def show_finances_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_finances_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show finances screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
     # Get finance data from MCP
-    finance_data = mcp_dadata_service.get_company_finances(inn)
+    finance_data = await mcp_dadata_service.get_company_finances(inn)
     
-    # Format using Assistant
+    # Format screen
     user_id = update.effective_user.id
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     if company_data:
-        company_data['data']['finance'] = finance_data
-    
-    message = assistant_service.format_screen(user_id, 'finances', company_data)
+        # Cached company data is shared, so build a copy instead of mutating it
+        company_data = {**company_data, 'data': {**company_data['data'], 'finance': finance_data}}
     
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'finances', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_requisites_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_requisites_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show requisites screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'requisites', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'requisites', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_address_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_address_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show address screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'address', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'address', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_directors_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_directors_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show directors history screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'directors', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'directors', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_founders_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_founders_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show founders screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'founders', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'founders', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_addresses_history_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_addresses_history_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show addresses history screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'addresses_history', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'addresses_history', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_okved_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_okved_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show OKVED screen."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     user_id = update.effective_user.id
-    message = assistant_service.format_screen(user_id, 'okved', company_data)
-    
-    await query.edit_message_text(
-        message,
-        parse_mode='HTML',
-        reply_markup=get_back_keyboard(f"company:{inn}")
-    )
+    await _show_screen(query, user_id, 'okved', company_data, inn, get_back_keyboard(f"company:{inn}"))
 
 
-async def show_history_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_history_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Show history submenu."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [InlineKeyboardButton("👤 Директора", callback_data=f"directors:{inn}")],
@@ -209,16 +189,28 @@ async def show_history_menu_callback(update: Update, context: ContextTypes.DEFAU
     )
 
 
-async def show_export_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_export_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str, screen: str):
     """Show export menu."""
     query = update.callback_query
     await query.answer()
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    screen = query.data.split(':')[2] if len(query.data.split(':')) > 2 else 'main'
-    
     await query.edit_message_text(
         "📄 <b>Экспорт в PDF</b>\n\nВыберите формат:",
         parse_mode='HTML',
         reply_markup=get_export_menu_keyboard(inn, screen)
     )
+
+
+ROUTES = [
+    CallbackRoute('company', show_company_callback, Arg('inn', inn_arg)),
+    CallbackRoute('brief', show_company_callback, Arg('inn', inn_arg)),
+    CallbackRoute('finances', show_finances_callback, Arg('inn', inn_arg)),
+    CallbackRoute('requisites', show_requisites_callback, Arg('inn', inn_arg)),
+    CallbackRoute('address', show_address_callback, Arg('inn', inn_arg)),
+    CallbackRoute('history', show_history_menu_callback, Arg('inn', inn_arg)),
+    CallbackRoute('directors', show_directors_callback, Arg('inn', inn_arg)),
+    CallbackRoute('founders', show_founders_callback, Arg('inn', inn_arg)),
+    CallbackRoute('addresses_history', show_addresses_history_callback, Arg('inn', inn_arg)),
+    CallbackRoute('okved', show_okved_callback, Arg('inn', inn_arg)),
+    CallbackRoute('export_menu', show_export_menu_callback, Arg('inn', inn_arg), Arg('screen', screen_arg, default='main')),
+]
@@ -1,29 +1,44 @@
 """Export handlers for PDF generation."""
 import logging
-from telegram import Update
+from typing import Any, Awaitable, Callable, Dict
+from telegram import CallbackQuery, Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
-from bot.services.pdf_export import pdf_service
-from bot.services.mcp_dadata import mcp_dadata_service
+from bot.services.export_cache import export_cache
+from bot.services.pdf_pool import PDFPoolBusy, PDFRenderTimeout, pdf_pool
 from bot.utils.keyboards import get_back_keyboard
+from bot.handlers.company import get_company
+from bot.handlers.router import Arg, CallbackRoute, inn_arg, screen_arg
 
 logger = logging.getLogger(__name__)
 
 
-async def export_screen_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _send_pdf(query: CallbackQuery, company_data: Dict[str, Any], report: str,
+                    render: Callable[[], Awaitable[bytes]], filename: str, caption: str):
+    """Send PDF by cached file_id, rendering and uploading it only on a miss."""
+    key = export_cache.key(company_data, report)
+    file_id = await export_cache.get_file_id(key)
+    if file_id:
+        try:
+            await query.message.reply_document(document=file_id, caption=caption)
+            return
+        except BadRequest as e:
+            logger.warning(f"Cached PDF file_id rejected, rendering again: {e}")
+            await export_cache.forget(key)
+    
+    pdf_bytes = await render()
+    message = await query.message.reply_document(document=pdf_bytes, filename=filename, caption=caption)
+    if message.document:
+        await export_cache.store(key, message.document.file_id)
+
+
+async def export_screen_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str, screen: str):
     """Export current screen to PDF."""
     query = update.callback_query
     await query.answer("📄 Генерация PDF...")
     
-    parts = query.data.split(':')
-    inn = parts[1] if len(parts) > 1 else context.user_data.get('inn')
-    screen = parts[2] if len(parts) > 2 else 'main'
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
     # Get company data
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     if not company_data:
         await query.edit_message_text("❌ Данные компании не найдены")
@@ -43,16 +58,15 @@ async def export_screen_callback(update: Update, context: ContextTypes.DEFAULT_T
         }
         
         screen_name = screen_names.get(screen, 'Отчет')
-        pdf_buffer = pdf_service.export_company_screen(company_data, screen_name)
         
         company_name = company_data.get('data', {}).get('name', {}).get('short', 'company')
         filename = f"{company_name}_{screen}.pdf"
         
-        # Send PDF
-        await query.message.reply_document(
-            document=pdf_buffer,
-            filename=filename,
-            caption=f"📄 Экспорт: {screen_name}"
+        # Send PDF (repeat exports reuse the uploaded file)
+        await _send_pdf(
+            query, company_data, f"screen:{screen_name}",
+            lambda: pdf_pool.render_screen(company_data, screen_name),
+            filename, f"📄 Экспорт: {screen_name}"
         )
         
         await query.edit_message_text(
@@ -60,6 +74,18 @@ async def export_screen_callback(update: Update, context: ContextTypes.DEFAULT_T
             reply_markup=get_back_keyboard(f"company:{inn}")
         )
         
+    except PDFPoolBusy:
+        logger.warning(f"PDF queue full, rejecting export of {inn}")
+        await query.edit_message_text(
+            "⏳ Сейчас формируется слишком много отчётов. Попробуйте через минуту.",
+            reply_markup=get_back_keyboard(f"company:{inn}")
+        )
+    except PDFRenderTimeout as e:
+        logger.error(f"PDF export of {inn} timed out: {e}")
+        await query.edit_message_text(
+            "❌ Генерация PDF заняла слишком много времени. Попробуйте позже.",
+            reply_markup=get_back_keyboard(f"company:{inn}")
+        )
     except Exception as e:
         logger.error(f"Error generating PDF: {e}")
         await query.edit_message_text(
@@ -68,36 +94,27 @@ async def export_screen_callback(update: Update, context: ContextTypes.DEFAULT_T
         )
 
 
-async def export_full_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def export_full_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str):
     """Export full company report to PDF."""
     query = update.callback_query
     await query.answer("📚 Генерация полного отчёта...")
     
-    inn = query.data.split(':')[1] if ':' in query.data else context.user_data.get('inn')
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
     # Get company data
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    company_data = await get_company(context, inn)
     
     if not company_data:
         await query.edit_message_text("❌ Данные компании не найдены")
         return
     
     try:
-        # Generate full PDF report
-        pdf_buffer = pdf_service.export_full_report(company_data)
-        
         company_name = company_data.get('data', {}).get('name', {}).get('short', 'company')
         filename = f"{company_name}_full_report.pdf"
         
-        # Send PDF
-        await query.message.reply_document(
-            document=pdf_buffer,
-            filename=filename,
-            caption="📚 Полный отчёт по компании"
+        # Generate and send full PDF report (repeat exports reuse the uploaded file)
+        await _send_pdf(
+            query, company_data, 'full',
+            lambda: pdf_pool.render_full_report(company_data),
+            filename, "📚 Полный отчёт по компании"
         )
         
         await query.edit_message_text(
@@ -105,9 +122,27 @@ async def export_full_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             reply_markup=get_back_keyboard(f"company:{inn}")
         )
         
+    except PDFPoolBusy:
+        logger.warning(f"PDF queue full, rejecting full report of {inn}")
+        await query.edit_message_text(
+            "⏳ Сейчас формируется слишком много отчётов. Попробуйте через минуту.",
+            reply_markup=get_back_keyboard(f"company:{inn}")
+        )
+    except PDFRenderTimeout as e:
+        logger.error(f"Full report of {inn} timed out: {e}")
+        await query.edit_message_text(
+            "❌ Генерация отчёта заняла слишком много времени. Попробуйте позже.",
+            reply_markup=get_back_keyboard(f"company:{inn}")
+        )
     except Exception as e:
         logger.error(f"Error generating full report: {e}")
         await query.edit_message_text(
             f"❌ Ошибка при генерации отчёта: {str(e)}",
             reply_markup=get_back_keyboard(f"company:{inn}")
         )
+
+
+ROUTES = [
+    CallbackRoute('export_screen', export_screen_callback, Arg('inn', inn_arg), Arg('screen', screen_arg, default='main')),
+    CallbackRoute('export_full', export_full_callback, Arg('inn', inn_arg)),
+]
@@ -2,42 +2,38 @@
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from bot.services.court import court_service
-from bot.services.procurement import procurement_service
-from bot.services.mcp_dadata import mcp_dadata_service
+from bot.utils.formatters import _e
 from bot.utils.keyboards import get_pagination_keyboard, get_back_keyboard
+from bot.handlers.company import get_company
+from bot.handlers.router import Arg, CallbackRoute, inn_arg, page_arg
 
 logger = logging.getLogger(__name__)
 
 
-async def show_court_cases_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_court_cases_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str, page: int):
     """Show court cases screen."""
     query = update.callback_query
     await query.answer()
     
-    parts = query.data.split(':')
-    inn = parts[1] if len(parts) > 1 else context.user_data.get('inn')
-    page = int(parts[2]) if len(parts) > 2 else 1
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
-    # Get company data for context
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    # Get company data for context (user_data may hold another company)
+    company_data = await get_company(context, inn)
     company_name = company_data.get('data', {}).get('name', {}).get('short', 'Компания') if company_data else 'Компания'
     
     # Get court cases (best-effort parsing)
     await query.edit_message_text("⏳ Поиск судебных дел...")
     
-    cases_data = court_service.search_cases(inn=inn, company_name=company_name, page=page)
+    # Parser dependencies are loaded on first search
+    from bot.services.court import court_service
+    
+    # Court sites are searched by the name DaData has for this INN
+    cases_data = await court_service.search_cases(inn=inn, page=page)
     
     message = f"""
 ┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
 ┃ ⚖️ СУДЕБНЫЕ ДЕЛА
 ┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
 
-<b>Компания:</b> {company_name}
+<b>Компания:</b> {_e(company_name)}
 <b>ИНН:</b> <code>{inn}</code>
 
 """
@@ -47,19 +43,19 @@ async def show_court_cases_callback(update: Update, context: ContextTypes.DEFAUL
     note = cases_data.get('note', '')
     
     if not cases:
-        message += f"ℹ️ Дела не найдены\n\n<i>{note}</i>"
+        message += f"ℹ️ Дела не найдены\n\n<i>{_e(note)}</i>"
     else:
         message += f"<b>Всего дел:</b> {total}\n<b>Страница:</b> {page}\n\n"
         for i, case in enumerate(cases, 1):
-            case_num = case.get('number', 'Н/Д')
-            case_date = case.get('date', 'Н/Д')
-            case_status = case.get('status', 'Н/Д')
+            case_num = _e(case.get('number', 'Н/Д'))
+            case_date = _e(case.get('date', 'Н/Д'))
+            case_status = _e(case.get('status', 'Н/Д'))
             message += f"{i}. <b>{case_num}</b>\n"
             message += f"   📅 {case_date}\n"
             message += f"   📊 {case_status}\n\n"
         
         if note:
-            message += f"\n<i>{note}</i>"
+            message += f"\n<i>{_e(note)}</i>"
     
     # Pagination
     per_page = cases_data.get('per_page', 10)
@@ -77,34 +73,28 @@ async def show_court_cases_callback(update: Update, context: ContextTypes.DEFAUL
     )
 
 
-async def show_procurement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_procurement_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, inn: str, page: int):
     """Show government procurement screen."""
     query = update.callback_query
     await query.answer()
     
-    parts = query.data.split(':')
-    inn = parts[1] if len(parts) > 1 else context.user_data.get('inn')
-    page = int(parts[2]) if len(parts) > 2 else 1
-    
-    if not inn:
-        await query.edit_message_text("❌ Ошибка: ИНН не найден")
-        return
-    
-    # Get company data for context
-    company_data = context.user_data.get('company') or mcp_dadata_service.find_by_inn(inn)
+    # Get company data for context (user_data may hold another company)
+    company_data = await get_company(context, inn)
     company_name = company_data.get('data', {}).get('name', {}).get('short', 'Компания') if company_data else 'Компания'
     
-    # Get procurement data (best-effort parsing)
+    # Get procurement data from the local index
     await query.edit_message_text("⏳ Поиск госзакупок...")
     
-    procurement_data = procurement_service.search_procurements(inn=inn, company_name=company_name, page=page)
+    from bot.services.procurement import procurement_service
+    
+    procurement_data = await procurement_service.search_procurements(inn=inn, company_name=company_name, page=page)
     
     message = f"""
 ┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
 ┃ 🏛 ГОСЗАКУПКИ
 ┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
 
-<b>Компания:</b> {company_name}
+<b>Компания:</b> {_e(company_name)}
 <b>ИНН:</b> <code>{inn}</code>
 
 """
@@ -114,21 +104,25 @@ async def show_procurement_callback(update: Update, context: ContextTypes.DEFAUL
     note = procurement_data.get('note', '')
     
     if not procurements:
-        message += f"ℹ️ Закупки не найдены\n\n<i>{note}</i>"
+        message += f"ℹ️ Закупки не найдены\n\n<i>{_e(note)}</i>"
     else:
         message += f"<b>Всего закупок:</b> {total}\n<b>Страница:</b> {page}\n\n"
         for i, proc in enumerate(procurements, 1):
-            proc_num = proc.get('number', 'Н/Д')
-            proc_date = proc.get('date', 'Н/Д')
-            proc_sum = proc.get('sum', 'Н/Д')
-            proc_status = proc.get('status', 'Н/Д')
+            proc_num = _e(proc.get('number', 'Н/Д'))
+            proc_date = _e(proc.get('date', 'Н/Д'))
+            proc_sum = _e(proc.get('sum', 'Н/Д'))
+            proc_status = _e(proc.get('status', 'Н/Д'))
             message += f"{i}. <b>{proc_num}</b>\n"
+            if proc.get('role'):
+                message += f"   👤 {_e(proc['kind'])}, {_e(proc['role'])}\n"
+            if proc.get('subject'):
+                message += f"   📦 {_e(proc['subject'][:100])}\n"
             message += f"   📅 {proc_date}\n"
             message += f"   💰 {proc_sum}\n"
             message += f"   📊 {proc_status}\n\n"
         
         if note:
-            message += f"\n<i>{note}</i>"
+            message += f"\n<i>{_e(note)}</i>"
     
     # Pagination
     per_page = procurement_data.get('per_page', 10)
@@ -146,25 +140,34 @@ async def show_procurement_callback(update: Update, context: ContextTypes.DEFAUL
     )
 
 
-async def handle_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle pagination for courts and procurement."""
-    query = update.callback_query
-    await query.answer()
-    
-    # Parse callback data: prefix:action:current_page:inn
-    parts = query.data.split(':')
-    prefix = parts[0]
-    action = parts[1]
-    current_page = int(parts[2])
-    inn = parts[3] if len(parts) > 3 else context.user_data.get('inn')
-    
-    # Calculate new page
-    new_page = current_page + 1 if action == 'next' else current_page - 1
-    
-    # Route to appropriate handler
-    if prefix == 'court':
-        context.user_data['temp_callback'] = f"court:{inn}:{new_page}"
-        await show_court_cases_callback(update, context)
-    elif prefix == 'procurement':
-        context.user_data['temp_callback'] = f"procurement:{inn}:{new_page}"
-        await show_procurement_callback(update, context)
+def _turn_page(action: str, current_page: int) -> int:
+    return current_page + 1 if action == 'next' else max(1, current_page - 1)
+
+
+async def court_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                              action: str, page: int, inn: str):
+    """Show next/previous page of court cases."""
+    await show_court_cases_callback(update, context, inn=inn, page=_turn_page(action, page))
+
+
+async def procurement_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                    action: str, page: int, inn: str):
+    """Show next/previous page of procurements."""
+    await show_procurement_callback(update, context, inn=inn, page=_turn_page(action, page))
+
+
+async def noop_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Acknowledge inert buttons (page counter)."""
+    await update.callback_query.answer()
+
+
+# Pagination data: prefix:action:current_page:inn
+ROUTES = [
+    CallbackRoute('court', show_court_cases_callback, Arg('inn', inn_arg), Arg('page', page_arg, default=1)),
+    CallbackRoute('procurement', show_procurement_callback, Arg('inn', inn_arg), Arg('page', page_arg, default=1)),
+    CallbackRoute('court', court_page_callback, Arg('page', page_arg), Arg('inn', inn_arg), action='next'),
+    CallbackRoute('court', court_page_callback, Arg('page', page_arg), Arg('inn', inn_arg), action='prev'),
+    CallbackRoute('procurement', procurement_page_callback, Arg('page', page_arg), Arg('inn', inn_arg), action='next'),
+    CallbackRoute('procurement', procurement_page_callback, Arg('page', page_arg), Arg('inn', inn_arg), action='prev'),
+    CallbackRoute('noop', noop_callback),
+]
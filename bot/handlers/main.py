@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from bot.utils.keyboards import get_main_menu_keyboard
 from bot.utils.formatters import format_help
+from bot.handlers.router import CallbackRoute
 
 logger = logging.getLogger(__name__)
 
@@ -65,3 +66,9 @@ async def help_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     help_text = format_help()
     await query.edit_message_text(help_text, parse_mode='HTML', reply_markup=get_main_menu_keyboard())
+
+
+ROUTES = [
+    CallbackRoute('main_menu', main_menu_callback),
+    CallbackRoute('help', help_callback),
+]
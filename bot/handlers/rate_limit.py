@@ -0,0 +1,67 @@
+"""Rate limiting guard running before all other handlers."""
+import logging
+import math
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+from config import config
+from bot.services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Token cost per callback prefix; other callbacks and messages cost DEFAULT_COST
+CALLBACK_COSTS = {
+    'main_menu': 0.2,
+    'help': 0.2,
+    'noop': 0.2,
+    'search_inn': 0.2,
+    'search_ogrn': 0.2,
+    'history': 0.2,
+    'export_menu': 0.2,
+    'court': 2,
+    'procurement': 2,
+    'export_screen': 5,
+    'export_full': 10,
+}
+DEFAULT_COST = 1
+# Screens formatted by the Assistant (see ASSISTANT_SCREENS)
+ASSISTANT_COST = 5
+
+# Callback prefixes showing a screen under a different name
+SCREEN_ALIASES = {'company': 'brief'}
+
+
+def get_update_cost(update: Update) -> float:
+    """Get token cost of handling update."""
+    query = update.callback_query
+    if query is None or not query.data:
+        return DEFAULT_COST
+
+    prefix = query.data.split(':', 1)[0]
+    if SCREEN_ALIASES.get(prefix, prefix) in config.ASSISTANT_SCREENS:
+        return ASSISTANT_COST
+    return CALLBACK_COSTS.get(prefix, DEFAULT_COST)
+
+
+async def rate_limit_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Stop update processing when the user or the bot is over its rate limit."""
+    user = update.effective_user
+    allowed, retry_after = await rate_limiter.acquire(
+        user.id if user else None,
+        get_update_cost(update)
+    )
+    if allowed:
+        return
+
+    wait = max(1, math.ceil(retry_after))
+    logger.info(f"Rate limited user {user.id if user else None}, retry in {wait}s")
+    text = f"⏳ Слишком много запросов. Попробуйте через {wait} сек."
+
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(text)
+        elif update.effective_message:
+            await update.effective_message.reply_text(text)
+    except Exception as e:
+        logger.warning(f"Error sending rate limit notice: {e}")
+
+    raise ApplicationHandlerStop
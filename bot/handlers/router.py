@@ -0,0 +1,157 @@
+"""Callback query routing by `prefix[:action]:arg:arg` data."""
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+from bot.services.resilience import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+_INN_RE = re.compile(r'\d{10}|\d{12}')
+_SCREEN_RE = re.compile(r'[a-z_]{1,32}')
+
+
+def inn_arg(value: str) -> str:
+    """Validate INN (10 or 12 digits)."""
+    if not _INN_RE.fullmatch(value):
+        raise ValueError(f"invalid INN '{value}'")
+    return value
+
+
+def page_arg(value: str) -> int:
+    """Validate page number (1-based)."""
+    page = int(value)
+    if page < 1:
+        raise ValueError(f"invalid page {page}")
+    return page
+
+
+def screen_arg(value: str) -> str:
+    """Validate screen name."""
+    if not _SCREEN_RE.fullmatch(value):
+        raise ValueError(f"invalid screen '{value}'")
+    return value
+
+
+class Arg:
+    """Callback argument: name, converter and optional default."""
+
+    __slots__ = ('name', 'convert', 'default', 'required')
+
+    def __init__(self, name: str, convert: Callable[[str], Any] = str, default: Any = None,
+                 required: bool = True):
+        self.name = name
+        self.convert = convert
+        self.default = default
+        self.required = required and default is None
+
+
+class CallbackRoute:
+    """
+    Callback data route declared by handler modules.
+
+    Matches `prefix:arg...` or, with `action`, `prefix:action:arg...`.
+    Parsed arguments are passed to the handler as keyword arguments
+    (plus `action` for action routes).
+    """
+
+    __slots__ = ('prefix', 'handler', 'args', 'action')
+
+    def __init__(self, prefix: str, handler: Callable[..., Awaitable[Any]],
+                 *args: Arg, action: Optional[str] = None):
+        self.prefix = prefix
+        self.handler = handler
+        self.args = args
+        self.action = action
+
+    def parse(self, values: List[str]) -> Dict[str, Any]:
+        """Convert callback values to handler kwargs, raising ValueError on bad input."""
+        if len(values) > len(self.args):
+            raise ValueError(f"too many arguments for '{self.prefix}'")
+
+        kwargs: Dict[str, Any] = {}
+        for i, arg in enumerate(self.args):
+            if i < len(values) and values[i] != '':
+                kwargs[arg.name] = arg.convert(values[i])
+            elif arg.required:
+                raise ValueError(f"missing '{arg.name}' for '{self.prefix}'")
+            else:
+                kwargs[arg.name] = arg.default
+        if self.action is not None:
+            kwargs['action'] = self.action
+        return kwargs
+
+
+class CallbackRouter:
+    """Dispatch callback queries to routes with one dict lookup."""
+
+    def __init__(self):
+        """Initialize router."""
+        self._routes: Dict[Tuple[str, Optional[str]], CallbackRoute] = {}
+        self.stats = {
+            'dispatched': 0,
+            'unknown': 0,
+            'invalid': 0,
+            'unavailable': 0,
+        }
+
+    def add(self, route: CallbackRoute):
+        """Register route."""
+        key = (route.prefix, route.action)
+        if key in self._routes:
+            raise ValueError(f"Duplicate callback route {key}")
+        self._routes[key] = route
+
+    def include(self, routes: Iterable[CallbackRoute]):
+        """Register routes declared by a handler module."""
+        for route in routes:
+            self.add(route)
+
+    def resolve(self, data: str) -> Tuple[Optional[CallbackRoute], List[str]]:
+        """Find route for callback data and the values left for its arguments."""
+        parts = data.split(':')
+        if len(parts) > 1:
+            route = self._routes.get((parts[0], parts[1]))
+            if route is not None:
+                return route, parts[2:]
+        return self._routes.get((parts[0], None)), parts[1:]
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle callback query."""
+        query = update.callback_query
+        route, values = self.resolve(query.data or '')
+
+        if route is None:
+            self.stats['unknown'] += 1
+            logger.warning(f"No route for callback data '{query.data}'")
+            await query.answer()
+            return
+
+        try:
+            kwargs = route.parse(values)
+        except ValueError as e:
+            self.stats['invalid'] += 1
+            logger.warning(f"Invalid callback data '{query.data}': {e}")
+            await query.answer("❌ Некорректный запрос", show_alert=True)
+            return
+
+        self.stats['dispatched'] += 1
+        try:
+            await route.handler(update, context, **kwargs)
+        except UpstreamUnavailable as e:
+            # Data source is down: say so (not "not found") and offer a retry
+            self.stats['unavailable'] += 1
+            logger.warning(f"Callback '{query.data}' failed: {e}")
+            try:
+                await query.edit_message_text(
+                    "⚠️ Источник данных временно недоступен. Попробуйте позже.",
+                    reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Повторить", callback_data=query.data)]])
+                )
+            except BadRequest as edit_error:
+                logger.warning(f"Could not report unavailable upstream: {edit_error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing counters."""
+        return {**self.stats, 'routes': len(self._routes)}
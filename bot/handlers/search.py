@@ -2,15 +2,18 @@
 import logging
 import re
 from telegram import Update
-from telegram.ext import ContextTypes, ConversationHandler
-from bot.services.dadata import dadata_service
+from telegram.ext import ContextTypes
+from bot.services.mcp_dadata import mcp_dadata_service
+from bot.services.resilience import UpstreamUnavailable
 from bot.utils.keyboards import get_company_menu_keyboard, get_main_menu_keyboard
 from bot.utils.formatters import format_company_info
+from bot.handlers.router import CallbackRoute
 
 logger = logging.getLogger(__name__)
 
-# Conversation states
-AWAITING_INN, AWAITING_OGRN = range(2)
+# Search state lives in user_data['state'] only: user_data is shared
+# across instances through persistence, while ConversationHandler states
+# are loaded once per instance and go stale.
 
 
 async def search_inn_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -25,7 +28,6 @@ async def search_inn_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
     )
     
     context.user_data['state'] = 'awaiting_inn'
-    return AWAITING_INN
 
 
 async def search_ogrn_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -40,7 +42,6 @@ async def search_ogrn_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     )
     
     context.user_data['state'] = 'awaiting_ogrn'
-    return AWAITING_OGRN
 
 
 async def handle_inn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -55,13 +56,21 @@ async def handle_inn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Попробуйте еще раз:",
             parse_mode='HTML'
         )
-        return AWAITING_INN
+        return
     
     # Show loading message
     loading_msg = await update.message.reply_text("⏳ Поиск информации...")
     
     # Search company
-    company_data = dadata_service.find_by_inn(inn)
+    try:
+        company_data = await mcp_dadata_service.find_by_inn(inn)
+    except UpstreamUnavailable:
+        await loading_msg.edit_text(
+            "⚠️ Сервис данных о компаниях временно недоступен.\n\n"
+            "Попробуйте ещё раз через минуту:",
+            parse_mode='HTML'
+        )
+        return
     
     if not company_data:
         await loading_msg.edit_text(
@@ -69,7 +78,7 @@ async def handle_inn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Попробуйте другой ИНН:",
             parse_mode='HTML'
         )
-        return AWAITING_INN
+        return
     
     # Store company data
     context.user_data['company'] = company_data
@@ -84,7 +93,6 @@ async def handle_inn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     context.user_data['state'] = None
-    return ConversationHandler.END
 
 
 async def handle_ogrn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -99,13 +107,21 @@ async def handle_ogrn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Попробуйте еще раз:",
             parse_mode='HTML'
         )
-        return AWAITING_OGRN
+        return
     
     # Show loading message
     loading_msg = await update.message.reply_text("⏳ Поиск информации...")
     
     # Search company
-    company_data = dadata_service.find_by_ogrn(ogrn)
+    try:
+        company_data = await mcp_dadata_service.find_by_ogrn(ogrn)
+    except UpstreamUnavailable:
+        await loading_msg.edit_text(
+            "⚠️ Сервис данных о компаниях временно недоступен.\n\n"
+            "Попробуйте ещё раз через минуту:",
+            parse_mode='HTML'
+        )
+        return
     
     if not company_data:
         await loading_msg.edit_text(
@@ -113,7 +129,7 @@ async def handle_ogrn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Попробуйте другой ОГРН:",
             parse_mode='HTML'
         )
-        return AWAITING_OGRN
+        return
     
     # Store company data
     context.user_data['company'] = company_data
@@ -129,11 +145,19 @@ async def handle_ogrn_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     context.user_data['state'] = None
-    return ConversationHandler.END
+
+
+async def handle_search_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle text input according to the search state in user_data."""
+    state = context.user_data.get('state')
+    if state == 'awaiting_inn':
+        await handle_inn_input(update, context)
+    elif state == 'awaiting_ogrn':
+        await handle_ogrn_input(update, context)
 
 
 async def cancel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle conversation cancellation."""
+    """Handle search cancellation."""
     context.user_data['state'] = None
     
     if update.message:
@@ -146,5 +170,9 @@ async def cancel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "❌ Операция отменена.",
             reply_markup=get_main_menu_keyboard()
         )
-    
-    return ConversationHandler.END
+
+
+ROUTES = [
+    CallbackRoute('search_inn', search_inn_callback),
+    CallbackRoute('search_ogrn', search_ogrn_callback),
+]
@@ -0,0 +1,78 @@
+"""Aggregated runtime metrics for health and monitoring endpoints."""
+import sys
+from typing import Any, Dict, Optional
+from bot.runtime import BotRuntime
+
+
+def _assistant_metrics() -> Optional[Dict[str, Any]]:
+    # The Assistant (and the OpenAI client) is loaded on first use only
+    if 'bot.services.assistant' not in sys.modules:
+        return None
+
+    from bot.services.assistant import assistant_service
+    return {
+        'threads': assistant_service.get_thread_stats(),
+        'usage': assistant_service.get_usage_stats(),
+        'ingest': assistant_service.ingestor.get_stats(),
+    }
+
+
+def _pdf_metrics() -> Optional[Dict[str, Any]]:
+    if 'bot.services.pdf_pool' not in sys.modules:
+        return None
+
+    from bot.services.pdf_pool import pdf_pool
+    return pdf_pool.get_stats()
+
+
+def _court_metrics() -> Optional[Dict[str, Any]]:
+    if 'bot.services.court' not in sys.modules:
+        return None
+
+    from bot.services.court import court_service
+    return court_service.get_stats()
+
+
+def _procurement_metrics() -> Optional[Dict[str, Any]]:
+    if 'bot.services.procurement' not in sys.modules:
+        return None
+
+    from bot.services.procurement import procurement_service
+    return procurement_service.get_stats()
+
+
+def collect_metrics(runtime: BotRuntime) -> Dict[str, Any]:
+    """Collect stats of the runtime, update queue and services."""
+    app = runtime.application
+    persistence = app.persistence if app is not None else None
+
+    # Imported here so metrics do not force-load services
+    from bot.services.mcp_dadata import mcp_dadata_service
+    from bot.services.rate_limiter import rate_limiter
+    from bot.services.export_cache import export_cache
+    from bot.services.result_sets import result_sets
+    from bot.services.prefetch import prefetcher
+    from bot.services.resilience import upstream_status
+    from bot.flood_limiter import flood_limiter
+    from bot.application import callback_router
+    from bot.handlers.company import screen_flight
+
+    return {
+        'runtime': runtime.get_stats(),
+        'queue': runtime.dispatcher.get_stats(),
+        'dedup': runtime.dedup.get_stats(),
+        'dadata': mcp_dadata_service.get_stats(),
+        'screens': screen_flight.get_stats(),
+        'rate_limit': rate_limiter.get_stats(),
+        'callbacks': callback_router.get_stats(),
+        'telegram_api': flood_limiter.get_stats(),
+        'persistence': persistence.get_stats() if persistence is not None else None,
+        'assistant': _assistant_metrics(),
+        'pdf': _pdf_metrics(),
+        'courts': _court_metrics(),
+        'procurement': _procurement_metrics(),
+        'result_sets': result_sets.get_stats(),
+        'prefetch': prefetcher.get_stats(),
+        'upstreams': upstream_status(),
+        'export_cache': export_cache.get_stats(),
+    }
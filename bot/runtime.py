@@ -0,0 +1,265 @@
+"""Long-lived event loop and Application runtime for webhook handlers."""
+import asyncio
+import atexit
+import hmac
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+from telegram import Update
+from telegram.ext import Application
+from config import config
+from bot.dedup import UpdateDeduplicator
+from bot.dispatcher import UpdateDispatcher
+from bot.services.prefetch import prefetcher
+
+logger = logging.getLogger(__name__)
+
+
+def verify_secret_token(token: Optional[str]) -> bool:
+    """Check X-Telegram-Bot-Api-Secret-Token header against TELEGRAM_WEBHOOK_SECRET."""
+    if not config.TELEGRAM_WEBHOOK_SECRET:
+        return True
+    return token is not None and hmac.compare_digest(token, config.TELEGRAM_WEBHOOK_SECRET)
+
+
+def parse_update(body: bytes) -> Optional[Dict[str, Any]]:
+    """Parse webhook body, returning None unless it is a Telegram update."""
+    try:
+        update_data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(update_data, dict) or not isinstance(update_data.get('update_id'), int):
+        return None
+    return update_data
+
+
+class BotRuntime:
+    """
+    Keep one event loop and one initialized Application per process.
+
+    The loop runs in a background thread, so synchronous HTTP handlers
+    (such as the Vercel BaseHTTPRequestHandler) submit coroutines to it
+    instead of creating a new loop per update. The Application, its bot
+    HTTP connection pool and all service sessions survive across
+    invocations of a warm instance.
+    """
+
+    def __init__(self, app_factory: Callable[[], Application]):
+        """
+        Initialize runtime.
+
+        Args:
+            app_factory: Callable building the Application with handlers registered
+        """
+        self._app_factory = app_factory
+        self._app: Optional[Application] = None
+        self._app_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._dispatcher: Optional[UpdateDispatcher] = None
+        self._active = 0
+        self.dedup = UpdateDeduplicator(config.UPDATE_DEDUP_WINDOW, config.UPDATE_DEDUP_TTL)
+
+        self.stats = {
+            'updates': 0,
+            'errors': 0,
+            'processing_seconds': 0.0,
+            'init_seconds': 0.0,
+        }
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get runtime event loop, starting it on first use."""
+        with self._thread_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='bot-event-loop',
+                    daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.shutdown)
+                logger.info("Started persistent event loop")
+        return self._loop
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run coroutine on the runtime loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    @property
+    def application(self) -> Optional[Application]:
+        """Initialized Application, or None before the first update."""
+        return self._app
+
+    async def get_application(self) -> Application:
+        """Get Application, building and initializing it once."""
+        if self._app is not None:
+            return self._app
+
+        if self._app_lock is None:
+            self._app_lock = asyncio.Lock()
+
+        async with self._app_lock:
+            if self._app is None:
+                started = time.perf_counter()
+                app = self._app_factory()
+                await app.initialize()
+                # Runs the write-behind persistence updater
+                await app.start()
+                self.stats['init_seconds'] = time.perf_counter() - started
+                logger.info(f"Application initialized in {self.stats['init_seconds'] * 1000:.0f} ms")
+                self._app = app
+        return self._app
+
+    @property
+    def load(self) -> int:
+        """Updates being processed or waiting in the queue."""
+        return self._active + (self._dispatcher.depth if self._dispatcher is not None else 0)
+
+    async def process_update(self, update_data: Dict[str, Any]):
+        """Deserialize update and process it with the Application."""
+        started = time.perf_counter()
+        self._active += 1
+        try:
+            # Background prefetch gives way to user updates
+            prefetcher.report_load(self.load)
+            app = await self.get_application()
+            update = Update.de_json(update_data, app.bot)
+            await app.process_update(update)
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            self._active -= 1
+            prefetcher.report_load(self.load)
+            elapsed = time.perf_counter() - started
+            self.stats['updates'] += 1
+            self.stats['processing_seconds'] += elapsed
+            logger.debug(f"Processed update {update_data.get('update_id')} in {elapsed * 1000:.0f} ms")
+
+    @property
+    def dispatcher(self) -> UpdateDispatcher:
+        """Get update queue dispatcher (fast-ack webhook mode)."""
+        if self._dispatcher is None:
+            self._dispatcher = UpdateDispatcher(
+                self.process_update,
+                workers=config.WEBHOOK_WORKERS,
+                max_queue=config.WEBHOOK_QUEUE_SIZE,
+                put_timeout=config.WEBHOOK_QUEUE_PUT_TIMEOUT
+            )
+        return self._dispatcher
+
+    async def enqueue_update(self, update_data: Dict[str, Any]) -> bool:
+        """
+        Queue update for background processing.
+
+        Returns:
+            False if the queue is full and the update was rejected
+        """
+        return await self.dispatcher.submit(update_data)
+
+    async def handle_update(self, update_data: Dict[str, Any]) -> bool:
+        """
+        Process update according to WEBHOOK_MODE.
+
+        Redelivered updates are dropped before any handler runs. In queue
+        mode the update is only enqueued and state is written behind; in
+        sync mode changed user_data is saved before returning. Processing
+        errors are logged, not raised: redelivery would fail the same way.
+
+        Returns:
+            False if the update was rejected and Telegram should redeliver it
+        """
+        update_id = update_data['update_id']
+        if await self.dedup.is_duplicate(update_id):
+            logger.info(f"Dropping redelivered update {update_id}")
+            return True
+
+        if config.WEBHOOK_MODE == 'queue':
+            accepted = await self.enqueue_update(update_data)
+            if not accepted:
+                await self.dedup.forget(update_id)
+            return accepted
+
+        try:
+            await self.process_update(update_data)
+        except Exception as e:
+            logger.error(f"Error processing update {update_id}: {e}", exc_info=True)
+        # The instance may be frozen once the response is sent, before the
+        # write-behind updater runs: the next message can reach another one
+        await self.flush_persistence()
+        return True
+
+    async def flush_persistence(self):
+        """Save user_data changed by processed updates now instead of write-behind."""
+        app = self._app
+        if app is None or app.persistence is None:
+            return
+        try:
+            await app.update_persistence()
+            await app.persistence.flush()
+        except Exception as e:
+            logger.error(f"Error flushing persistence: {e}")
+
+    async def close(self):
+        """Shut down Application and close shared service connections."""
+        if self._dispatcher is not None:
+            await self._dispatcher.stop()
+        prefetcher.cancel_all()
+
+        if self._app is not None:
+            if self._app.running:
+                await self._app.stop()
+            await self._app.shutdown()
+            self._app = None
+
+        # Only close services that were loaded; importing them here would
+        # construct clients just to close them
+        if 'bot.services.assistant' in sys.modules:
+            from bot.services.assistant import assistant_service
+            await assistant_service.ingestor.close()
+        if 'bot.services.mcp_dadata' in sys.modules:
+            from bot.services.mcp_dadata import mcp_dadata_service
+            await mcp_dadata_service.close()
+        if 'bot.services.court' in sys.modules:
+            from bot.services.court import court_service
+            await court_service.close()
+        if 'bot.services.pdf_pool' in sys.modules:
+            from bot.services.pdf_pool import pdf_pool
+            pdf_pool.shutdown()
+        if 'bot.services.redis_client' in sys.modules:
+            from bot.services.redis_client import close_redis
+            await close_redis()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Clean shutdown hook: close resources and stop the loop thread."""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Error during runtime shutdown: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+            logger.info("Runtime stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get update processing metrics."""
+        updates = self.stats['updates']
+        return {
+            **self.stats,
+            'active': self._active,
+            'avg_processing_ms': round(self.stats['processing_seconds'] / updates * 1000, 1) if updates else 0.0,
+        }
@@ -1,57 +1,305 @@
 """OpenAI Assistant and Vector Store service."""
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from openai import OpenAI
+import time
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
 from config import config
+from bot.services.prompt_payload import build_screen_payload, estimate_tokens
+from bot.services.resilience import UpstreamUnavailable, get_upstream
+from bot.services.thread_store import create_thread_store
+from bot.services.vector_ingest import VectorStoreIngestor
 
 logger = logging.getLogger(__name__)
 
+# Run statuses that are not terminal yet
+RUN_PENDING_STATUSES = ('queued', 'in_progress', 'requires_action', 'cancelling')
+
+# Stream events that carry the final run status
+RUN_TERMINAL_EVENTS = (
+    'thread.run.completed',
+    'thread.run.failed',
+    'thread.run.cancelled',
+    'thread.run.expired',
+    'thread.run.incomplete',
+)
+
+
+# OpenAI errors that count as upstream failures (left after the SDK's own retries)
+def _is_transient(e: BaseException) -> bool:
+    return isinstance(e, (asyncio.TimeoutError, APIConnectionError, RateLimitError, InternalServerError))
+
 
 class AssistantService:
     """Service for OpenAI Assistant with Vector Store."""
     
     def __init__(self):
         """Initialize OpenAI Assistant service."""
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
         self.assistant_id = config.OPENAI_ASSISTANT_ID
         self.vector_store_id = config.OPENAI_VECTOR_STORE_ID
+        self.ingestor = VectorStoreIngestor(
+            self.client,
+            self.vector_store_id,
+            batch_size=config.VECTOR_INGEST_BATCH_SIZE,
+            flush_interval=config.VECTOR_INGEST_FLUSH_INTERVAL
+        )
+        
+        # Thread management (memory, Redis or SQLite backend)
+        self.thread_store = create_thread_store()
+        self.thread_stats = {'reused': 0, 'created': 0, 'rotated': 0}
+        self.usage_stats: Dict[str, Dict[str, int]] = {}
         
-        # Thread management (in-memory for serverless)
-        self.threads = {}
+        # Runs post a message to the thread, so they are not retried here;
+        # the breaker fails fast while OpenAI is down
+        self.upstream = get_upstream('openai', attempts=1, retryable=_is_transient)
     
-    def get_or_create_thread(self, user_id: int) -> str:
-        """Get or create thread for user."""
-        if user_id not in self.threads:
+    async def get_or_create_thread(self, user_id: int) -> str:
+        """
+        Get or create thread for user.
+        
+        Each call counts one query against the thread. Once a thread has
+        received ASSISTANT_THREAD_MAX_MESSAGES queries a fresh one is
+        started, which keeps context size (and run cost) bounded.
+        """
+        try:
+            record = await self.thread_store.get(user_id)
+        except Exception as e:
+            logger.warning(f"Thread store read failed for user {user_id}: {e}")
+            record = None
+        
+        if record and record['messages'] < config.ASSISTANT_THREAD_MAX_MESSAGES:
+            record['messages'] += 1
+            self.thread_stats['reused'] += 1
+        else:
+            if record:
+                self.thread_stats['rotated'] += 1
+                logger.info(f"Rotating thread for user {user_id} after {record['messages']} messages")
             try:
-                thread = self.client.beta.threads.create()
-                self.threads[user_id] = thread.id
-                logger.info(f"Created new thread for user {user_id}: {thread.id}")
+                thread = await self.client.beta.threads.create()
             except Exception as e:
                 logger.error(f"Error creating thread: {e}")
                 raise
+            record = {'thread_id': thread.id, 'messages': 1, 'created_at': time.time()}
+            self.thread_stats['created'] += 1
+            logger.info(f"Created new thread for user {user_id}: {thread.id}")
+        
+        try:
+            await self.thread_store.set(user_id, record)
+        except Exception as e:
+            logger.warning(f"Thread store write failed for user {user_id}: {e}")
         
-        return self.threads[user_id]
+        return record['thread_id']
+    
+    def _record_usage(self, screen_type: str, payload_tokens: int, usage: Any):
+        """Accumulate per-screen payload and token usage."""
+        stats = self.usage_stats.setdefault(screen_type, {
+            'runs': 0, 'payload_tokens': 0, 'prompt_tokens': 0, 'completion_tokens': 0
+        })
+        stats['runs'] += 1
+        stats['payload_tokens'] += payload_tokens
+        if usage is not None:
+            stats['prompt_tokens'] += usage.prompt_tokens
+            stats['completion_tokens'] += usage.completion_tokens
+        logger.info(
+            f"Assistant run for '{screen_type}': payload ~{payload_tokens} tokens, "
+            f"usage {usage.prompt_tokens if usage else '?'} prompt / "
+            f"{usage.completion_tokens if usage else '?'} completion tokens"
+        )
+    
+    def get_usage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get average payload and token usage per screen."""
+        return {
+            screen: {
+                'runs': stats['runs'],
+                'avg_payload_tokens': round(stats['payload_tokens'] / stats['runs'], 1),
+                'avg_prompt_tokens': round(stats['prompt_tokens'] / stats['runs'], 1),
+                'avg_completion_tokens': round(stats['completion_tokens'] / stats['runs'], 1),
+            }
+            for screen, stats in self.usage_stats.items()
+        }
+    
+    def get_thread_stats(self) -> Dict[str, Any]:
+        """Get thread reuse metrics."""
+        total = self.thread_stats['reused'] + self.thread_stats['created']
+        return {
+            **self.thread_stats,
+            'reuse_rate': round(self.thread_stats['reused'] / total, 3) if total else 0.0,
+        }
     
     def store_in_vector_store(self, user_id: int, content: str, metadata: Dict[str, Any]):
-        """Store content in vector store for retrieval."""
-        try:
-            # Create a file with content
-            file = self.client.files.create(
-                file=content.encode('utf-8'),
-                purpose='assistants'
-            )
+        """Queue content for batched background ingestion into the vector store."""
+        if self.ingestor.submit(content, metadata):
+            logger.debug(f"Queued content for vector store ingestion for user {user_id}")
+    
+    async def _handle_required_action(self, thread_id: str, run, stream: bool = False):
+        """
+        Answer tool calls the bot cannot execute.
+        
+        The assistant only relies on file_search, so any function call is
+        answered with an error output to let the run finish.
+        """
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        logger.warning(f"Run {run.id} requested {len(tool_calls)} unsupported tool call(s)")
+        return await self.client.beta.threads.runs.submit_tool_outputs(
+            thread_id=thread_id,
+            run_id=run.id,
+            tool_outputs=[
+                {"tool_call_id": call.id, "output": "Function calls are not supported"}
+                for call in tool_calls
+            ],
+            stream=stream
+        )
+    
+    async def _wait_for_run(self, thread_id: str, run):
+        """
+        Wait for run to reach a terminal status.
+        
+        Polls with exponential backoff (ASSISTANT_POLL_INTERVAL growing up to
+        ASSISTANT_POLL_MAX_INTERVAL) and cancels the run once
+        ASSISTANT_RUN_TIMEOUT is exceeded.
+        
+        Raises:
+            asyncio.TimeoutError: If the run did not finish in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.ASSISTANT_RUN_TIMEOUT
+        delay = config.ASSISTANT_POLL_INTERVAL
+        
+        while run.status in RUN_PENDING_STATUSES:
+            if run.status == 'requires_action':
+                run = await self._handle_required_action(thread_id, run)
+                continue
             
-            # Add to vector store
-            self.client.beta.vector_stores.files.create(
-                vector_store_id=self.vector_store_id,
-                file_id=file.id
-            )
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning(f"Run {run.id} exceeded {config.ASSISTANT_RUN_TIMEOUT}s, cancelling")
+                try:
+                    await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
+                except Exception as e:
+                    logger.error(f"Error cancelling run {run.id}: {e}")
+                raise asyncio.TimeoutError(f"Run {run.id} timed out")
             
-            logger.info(f"Stored content in vector store for user {user_id}")
-        except Exception as e:
-            logger.error(f"Error storing in vector store: {e}")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, config.ASSISTANT_POLL_MAX_INTERVAL)
+            
+            run = await self.client.beta.threads.runs.retrieve(
+                thread_id=thread_id,
+                run_id=run.id
+            )
+        
+        return run
+    
+    async def _poll_run(self, thread_id: str) -> Tuple[str, Optional[str], Any, Any]:
+        """Create run, wait for it and fetch the reply with run usage."""
+        run = await self.client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id,
+            tools=[{"type": "file_search"}]
+        )
+        
+        # Wait for completion
+        run = await self._wait_for_run(thread_id, run)
+        
+        if run.status != 'completed':
+            return run.status, None, run.last_error, run.usage
+        
+        # Get latest assistant message
+        messages = await self.client.beta.threads.messages.list(thread_id=thread_id)
+        for message in messages.data:
+            if message.role == 'assistant':
+                return run.status, message.content[0].text.value, None, run.usage
+        
+        return run.status, None, None, run.usage
     
-    def query_company(self, user_id: int, query: str, company_data: Optional[Dict] = None) -> str:
+    async def _stream_run(self, thread_id: str,
+                          on_progress: Callable[[str], Awaitable[None]]) -> Tuple[str, Optional[str], Any, Any]:
+        """
+        Create streaming run and report accumulated text as it arrives.
+        
+        `on_progress` is awaited between stream events, so it must return
+        at once (ProgressiveEditor hands edits to a background task).
+        
+        Raises:
+            asyncio.TimeoutError: If the run did not finish within ASSISTANT_RUN_TIMEOUT
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.ASSISTANT_RUN_TIMEOUT
+        
+        stream = await self.client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id,
+            tools=[{"type": "file_search"}],
+            stream=True
+        )
+        
+        text = ''
+        status = 'in_progress'
+        last_error = None
+        usage = None
+        run_id = None
+        
+        while stream is not None:
+            events = stream.__aiter__()
+            next_stream = None
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    
+                    if event.event == 'thread.run.created':
+                        run_id = event.data.id
+                    elif event.event == 'thread.message.delta':
+                        for part in event.data.delta.content or []:
+                            if part.type == 'text' and part.text and part.text.value:
+                                text += part.text.value
+                        await on_progress(text)
+                    elif event.event == 'thread.run.requires_action':
+                        next_stream = await self._handle_required_action(thread_id, event.data, stream=True)
+                    elif event.event in RUN_TERMINAL_EVENTS:
+                        status = event.data.status
+                        last_error = event.data.last_error
+                        usage = event.data.usage
+                    elif event.event == 'error':
+                        status = 'failed'
+                        last_error = event.data
+            except asyncio.TimeoutError:
+                logger.warning(f"Streaming run {run_id} exceeded {config.ASSISTANT_RUN_TIMEOUT}s, cancelling")
+                await stream.close()
+                if run_id:
+                    try:
+                        await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+                    except Exception as e:
+                        logger.error(f"Error cancelling run {run_id}: {e}")
+                raise
+            stream = next_stream
+        
+        return status, text or None, last_error, usage
+    
+    async def _ask(self, user_id: int, message_content: str,
+                   on_progress: Optional[Callable[[str], Awaitable[None]]]) -> Tuple[str, Optional[str], Any, Any]:
+        """Post message to the user's thread and run the assistant on it."""
+        thread_id = await self.get_or_create_thread(user_id)
+        
+        await self.client.beta.threads.messages.create(
+            thread_id=thread_id,
+            role="user",
+            content=message_content
+        )
+        
+        # Run assistant with retrieval
+        if on_progress is not None:
+            return await self._stream_run(thread_id, on_progress)
+        return await self._poll_run(thread_id)
+    
+    async def query_company(self, user_id: int, query: str, company_data: Optional[Dict] = None,
+                            on_progress: Optional[Callable[[str], Awaitable[None]]] = None,
+                            screen_type: Optional[str] = None) -> str:
         """
         Query assistant about company with retrieval from vector store.
         
@@ -59,69 +307,64 @@ class AssistantService:
             user_id: Telegram user ID
             query: User query (e.g., "show finances", "directors history")
             company_data: Company data from MCP DaData
+            on_progress: Optional coroutine called with the text received so far
+                (must not block the stream); when given, the run is streamed
+                instead of polled
+            screen_type: Screen whose fields are sent to the assistant
+                (all normalized fields when omitted)
         
         Returns:
             Formatted response from assistant
         """
         try:
-            thread_id = self.get_or_create_thread(user_id)
-            
-            # Prepare message with company data
+            # Prepare message with compact company data
             message_content = query
+            payload_tokens = 0
             if company_data:
-                message_content += f"\n\nCompany Data from MCP DaData:\n{str(company_data)}"
-            
-            # Create message
-            self.client.beta.threads.messages.create(
-                thread_id=thread_id,
-                role="user",
-                content=message_content
-            )
+                payload = build_screen_payload(screen_type, company_data)
+                payload_tokens = estimate_tokens(payload)
+                message_content += f"\n\nCompany Data from MCP DaData (JSON):\n{payload}"
             
-            # Run assistant with retrieval
-            run = self.client.beta.threads.runs.create(
-                thread_id=thread_id,
-                assistant_id=self.assistant_id,
-                tools=[{"type": "file_search"}]
+            status, content, last_error, usage = await self.upstream.call(
+                lambda: self._ask(user_id, message_content, on_progress), hedge=False
             )
             
-            # Wait for completion
-            while run.status in ['queued', 'in_progress']:
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=thread_id,
-                    run_id=run.id
-                )
+            self._record_usage(screen_type or 'query', payload_tokens, usage)
             
-            if run.status == 'completed':
-                # Get messages
-                messages = self.client.beta.threads.messages.list(
-                    thread_id=thread_id
-                )
+            if status == 'completed':
+                if not content:
+                    return "Не удалось получить ответ от ассистента."
                 
-                # Get latest assistant message
-                for message in messages.data:
-                    if message.role == 'assistant':
-                        content = message.content[0].text.value
-                        
-                        # Store response in vector store
-                        self.store_in_vector_store(
-                            user_id,
-                            f"Query: {query}\nResponse: {content}",
-                            {"user_id": user_id, "type": "query_response"}
-                        )
-                        
-                        return content
+                # Store response in vector store (in background)
+                self.store_in_vector_store(
+                    user_id,
+                    f"Query: {query}\nResponse: {content}",
+                    {"user_id": user_id, "type": "query_response"}
+                )
                 
-                return "Не удалось получить ответ от ассистента."
+                return content
+            elif status == 'expired':
+                logger.error(f"Run expired for user {user_id}")
+                return "Время ожидания ответа ассистента истекло."
+            elif status == 'cancelled':
+                logger.error(f"Run was cancelled for user {user_id}")
+                return "Запрос к ассистенту был отменён."
             else:
-                logger.error(f"Run failed with status: {run.status}")
+                logger.error(f"Run failed with status: {status} ({last_error})")
                 return "Произошла ошибка при обработке запроса."
-                
+        
+        except UpstreamUnavailable as e:
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                logger.error(f"Assistant run timed out for user {user_id}")
+                return "Время ожидания ответа ассистента истекло."
+            logger.error(f"Assistant unavailable for user {user_id}: {e.reason}")
+            return "⚠️ Ассистент временно недоступен. Попробуйте позже."
         except Exception as e:
             logger.error(f"Error querying assistant: {e}")
             return f"Ошибка: {str(e)}"
     
-    def format_screen(self, user_id: int, screen_type: str, company_data: Dict) -> str:
+    async def format_screen(self, user_id: int, screen_type: str, company_data: Dict,
+                            on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
         """
         Format specific screen using assistant.
         
@@ -129,6 +372,7 @@ class AssistantService:
             user_id: Telegram user ID
             screen_type: Type of screen (brief, finances, requisites, etc.)
             company_data: Company data from MCP DaData
+            on_progress: Optional coroutine receiving partial text while streaming
         
         Returns:
             Formatted screen content
@@ -145,7 +389,7 @@ class AssistantService:
         }
         
         prompt = screen_prompts.get(screen_type, 'Покажи информацию о компании.')
-        return self.query_company(user_id, prompt, company_data)
+        return await self.query_company(user_id, prompt, company_data, on_progress, screen_type=screen_type)
     
     def search_vector_store(self, query: str) -> List[Dict]:
         """Search vector store for relevant content."""
@@ -0,0 +1,130 @@
+"""Two-tier cache: in-process LRU in front of shared Redis."""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """
+    Bounded LRU cache backed by Redis with stale-while-revalidate.
+
+    Entries are fresh for `ttl` seconds and may be served as stale for
+    another `stale_ttl` seconds while the caller refreshes them.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, namespace: str, ttl: int, stale_ttl: int = 0, max_items: int = 1024):
+        """Initialize cache."""
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_items = max_items
+
+        # key -> (value, stored_at)
+        self._local: OrderedDict = OrderedDict()
+
+        self.stats = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'redis_errors': 0,
+        }
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _age_state(self, stored_at: float) -> Optional[bool]:
+        """Return True if fresh, False if stale, None if expired."""
+        age = time.time() - stored_at
+        if age < self.ttl:
+            return True
+        if age < self.ttl + self.stale_ttl:
+            return False
+        return None
+
+    def _set_local(self, key: str, value: Any, stored_at: float):
+        self._local[key] = (value, stored_at)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_items:
+            self._local.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    async def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        """
+        Get value from cache.
+
+        Returns:
+            Tuple of (value, is_fresh). Value is None on miss.
+        """
+        entry = self._local.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            fresh = self._age_state(stored_at)
+            if fresh is not None:
+                self._local.move_to_end(key)
+                self.stats['local_hits' if fresh else 'stale_hits'] += 1
+                return value, fresh
+            del self._local[key]
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._redis_key(key))
+                if raw:
+                    payload = json.loads(raw)
+                    fresh = self._age_state(payload['t'])
+                    if fresh is not None:
+                        self._set_local(key, payload['v'], payload['t'])
+                        self.stats['redis_hits' if fresh else 'stale_hits'] += 1
+                        return payload['v'], fresh
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.warning(f"Redis cache read failed for {self.namespace}:{key}: {e}")
+
+        self.stats['misses'] += 1
+        return None, False
+
+    async def set(self, key: str, value: Any):
+        """Store value in both tiers."""
+        stored_at = time.time()
+        self._set_local(key, value, stored_at)
+        self.stats['sets'] += 1
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                payload = json.dumps({'v': value, 't': stored_at}, ensure_ascii=False)
+                await redis.set(self._redis_key(key), payload, ex=self.ttl + self.stale_ttl)
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.warning(f"Redis cache write failed for {self.namespace}:{key}: {e}")
+
+    async def delete(self, key: str):
+        """Remove value from both tiers."""
+        self._local.pop(key, None)
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._redis_key(key))
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.warning(f"Redis cache delete failed for {self.namespace}:{key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters."""
+        hits = self.stats['local_hits'] + self.stats['redis_hits'] + self.stats['stale_hits']
+        total = hits + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self._local),
+            'hit_ratio': round(hits / total, 3) if total else 0.0,
+        }
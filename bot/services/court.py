@@ -1,73 +1,287 @@
-"""Court cases parser for sudrf.ru."""
+"""Court cases crawler for sudrf.ru regional court sites."""
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-import requests
-from bs4 import BeautifulSoup
+import re
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlencode, urljoin
+import aiohttp
+import lxml.html
+from yarl import URL
+from config import config
+from bot.services.cache import TwoTierCache
+from bot.services.mcp_dadata import mcp_dadata_service
+from bot.services.resilience import get_upstream, is_transient_http_error
+from bot.services.result_sets import page_slice, result_sets
+from bot.services.singleflight import create_single_flight
+from bot.services.sudrf_hosts import REGION_HOSTS
 
 logger = logging.getLogger(__name__)
 
+# Civil cases of first instance, searched by party name
+_SEARCH_PARAMS = {
+    'name': 'sud_delo',
+    'srv_num': '1',
+    'name_op': 'r',
+    'delo_id': '1540005',
+    'case_type': '0',
+    'new': '0',
+    'delo_table': 'g1_case',
+    'Submit': 'Найти',
+}
+_PARTY_PARAM = 'G1_PARTS__NAMESS'
+
+_LEGAL_FORMS = re.compile(r'^(ООО|ОАО|ЗАО|ПАО|АО|НАО|ИП|ФГУП|МУП|ГУП|АНО)\s+', re.IGNORECASE)
+
+
+def parse_hosts(spec: str) -> Dict[str, List[str]]:
+    """
+    Parse SUDRF_HOSTS: `region=host,host;region=host`.
+
+    Region `*` lists hosts searched for every INN. A region listed here
+    replaces its default hosts (sudrf_hosts.REGION_HOSTS).
+    """
+    hosts: Dict[str, List[str]] = {}
+    for entry in spec.split(';'):
+        region, _, names = entry.partition('=')
+        names = [name.strip() for name in names.split(',') if name.strip()]
+        if region.strip() and names:
+            hosts[region.strip()] = names
+    return hosts
+
+
+def party_query(company_name: str) -> str:
+    """Company name as typed into the court search form (no legal form, no quotes)."""
+    name = company_name.replace('"', ' ').replace('«', ' ').replace('»', ' ')
+    return _LEGAL_FORMS.sub('', ' '.join(name.split()))
+
+
+def _sort_key(case: Dict[str, Any]) -> datetime:
+    try:
+        return datetime.strptime(case.get('date', ''), '%d.%m.%Y')
+    except ValueError:
+        return datetime.min
+
 
 class CourtCasesService:
-    """Service for parsing court cases from sudrf.ru."""
-    
+    """
+    Search court cases on sudrf.ru.
+
+    sudrf.ru is split into regional court sites. A search fans out to the
+    sites of the company's region, at most `per_host` requests at a time
+    per site, and merges the results into one list sorted by date. The
+    search stops after `deadline` seconds and returns what was collected
+    from the sites that answered in time (marked `partial`). Complete
+    results are cached per INN.
+    """
+
     def __init__(self):
         """Initialize court cases service."""
-        self.base_url = "https://sudrf.ru"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.region_hosts = {**REGION_HOSTS, **parse_hosts(config.SUDRF_HOSTS)}
+        self.per_host = config.SUDRF_PER_HOST_CONCURRENCY
+        self.deadline = config.SUDRF_DEADLINE
+        self.request_timeout = config.SUDRF_REQUEST_TIMEOUT
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-    
-    def search_cases(self, inn: str = None, company_name: str = None, page: int = 1, 
-                     per_page: int = 10) -> Dict[str, Any]:
+        }
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        self.cache = TwoTierCache('court', ttl=config.COURT_CACHE_TTL, max_items=config.COURT_CACHE_MAX_ITEMS)
+        self._flight = create_single_flight('court')
+
+        self.stats = {
+            'searches': 0,
+            'host_requests': 0,
+            'host_errors': 0,
+            'partial': 0,
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get shared session bound to the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._session_loop = loop
+            self._host_limits = {}
+        return self._session
+
+    async def close(self):
+        """Close shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def get_hosts(self, inn: str) -> List[str]:
+        """Court sites to search for company registered in the INN's region."""
+        hosts = self.region_hosts.get(inn[:2], []) + self.region_hosts.get('*', [])
+        return list(dict.fromkeys(hosts))
+
+    def _search_url(self, host: str, party: str) -> URL:
+        # Court sites expect windows-1251 form data
+        query = urlencode({**_SEARCH_PARAMS, _PARTY_PARAM: party}, encoding='cp1251')
+        return URL(f"https://{host}/modules.php?{query}", encoded=True)
+
+    def _parse_cases(self, host: str, html: str) -> List[Dict[str, Any]]:
+        """Parse search results table (`#tablcont`) of a court site."""
+        doc = lxml.html.document_fromstring(html)
+        court = ' '.join((doc.findtext('.//title') or host).split())
+
+        cases = []
+        for row in doc.xpath('//table[@id="tablcont"]//tr[td]'):
+            cells = [' '.join(cell.text_content().split()) for cell in row.findall('td')]
+            if len(cells) < 6 or not cells[0]:
+                continue
+            link = row.find('td//a[@href]')
+            cases.append({
+                'number': cells[0],
+                'date': cells[1],
+                'category': cells[2],
+                'judge': cells[3],
+                'decision_date': cells[4],
+                'status': cells[5] or 'В производстве',
+                'court': court,
+                'url': urljoin(f"https://{host}/", link.get('href')) if link is not None else None,
+            })
+        return cases
+
+    async def _fetch_host(self, host: str, party: str) -> str:
+        session = await self._get_session()
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with limit:
+            self.stats['host_requests'] += 1
+            async with session.get(self._search_url(host, party)) as response:
+                response.raise_for_status()
+                body = await response.read()
+        return body.decode(response.charset or 'cp1251', errors='replace')
+
+    async def _search_host(self, host: str, party: str) -> List[Dict[str, Any]]:
         """
-        Search for court cases (best-effort parsing).
-        
-        Note: This is a simplified implementation as sudrf.ru has complex
-        structure and may require authentication/captcha solving.
+        Search one court site, waiting for a free per-host slot.
+
+        Each site has its own circuit breaker: a site that keeps failing is
+        skipped right away (the result is marked partial) instead of
+        holding the crawl until the deadline.
         """
+        upstream = get_upstream(f"sudrf:{host}", retryable=is_transient_http_error)
+        page = await upstream.call(lambda: self._fetch_host(host, party))
+        return self._parse_cases(host, page)
+
+    async def _party(self, inn: str) -> Optional[str]:
+        """Search query for the company registered under INN, None without a name."""
+        company = await mcp_dadata_service.find_by_inn(inn)
+        name = company.get('data', {}).get('name', {}).get('short') if company else None
+        if not name or name == 'нет данных':
+            return None
+        return party_query(name) or None
+
+    async def _crawl(self, inn: str, party: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """Search all court sites of the region; returns (cases, complete)."""
+        hosts = self.get_hosts(inn)
+        if not party:
+            # Nothing was searched: not a complete (cacheable) empty result
+            return [], False
+        if not hosts:
+            return [], True
+
+        tasks = {asyncio.create_task(self._search_host(host, party)): host for host in hosts}
         try:
-            # Mock implementation - in production, this would need:
-            # 1. Proper API integration or selenium for complex parsing
-            # 2. Captcha solving
-            # 3. Session management
-            # 4. Detailed HTML parsing
-            
-            result = {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'cases': [],
-                'note': 'Для получения актуальных данных о судебных делах требуется доступ к API суда или специализированным сервисам. '
-                       'Рекомендуется использовать платные API (например, Casebook.ru или аналоги).'
-            }
-            
-            # Try to get data (best-effort)
-            # This is a placeholder for actual implementation
-            result['cases'] = self._parse_mock_cases(inn, company_name)
-            result['total'] = len(result['cases'])
-            
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        finally:
+            # Also stops site requests when the crawl itself is cancelled
+            for task in tasks:
+                task.cancel()
+
+        cases, failed = [], len(pending)
+        for task in done:
+            if task.exception() is not None:
+                failed += 1
+                self.stats['host_errors'] += 1
+                logger.warning(f"Court search on {tasks[task]} failed: {task.exception()!r}")
+            else:
+                cases.extend(task.result())
+        if pending:
+            logger.warning(f"Court search for {inn}: {len(pending)} of {len(hosts)} sites missed the deadline")
+
+        # Keep one row per case
+        unique = {(case['court'], case['number']): case for case in cases}
+        return sorted(unique.values(), key=_sort_key, reverse=True), failed == 0
+
+    async def _crawl_and_store(self, inn: str, party: str) -> Dict[str, Any]:
+        cases, complete = await self._crawl(inn, party)
+        result = {'cases': cases, 'partial': not complete, 'hosts': len(self.get_hosts(inn))}
+        if complete:
+            await self.cache.set(inn, result)
+        else:
+            self.stats['partial'] += 1
+        return result
+
+    async def _get_all_cases(self, inn: str, party: str, background: bool = False) -> Dict[str, Any]:
+        """All cases of company from cache or a coalesced crawl."""
+        cached, _ = await self.cache.get(inn)
+        if cached is not None:
+            return cached
+        return await self._flight.do(inn, lambda: self._crawl_and_store(inn, party),
+                                     cancel_abandoned=background)
+
+    async def search_cases(self, inn: str = None, page: int = 1, per_page: int = 10,
+                           background: bool = False) -> Dict[str, Any]:
+        """
+        Search for court cases of company.
+
+        Court sites are searched by the name DaData has for the INN (never
+        a name passed by the caller, since results are cached per INN), so
+        results may include namesakes; the INN selects the region.
+        Cancelling a `background` search (prefetch) stops its crawl unless
+        a user is waiting for it.
+
+        Raises:
+            UpstreamUnavailable: DaData is down and the name is unknown
+        """
+        self.stats['searches'] += 1
+        result = {
+            'total': 0,
+            'page': page,
+            'per_page': per_page,
+            'cases': [],
+            'note': 'Данные sudrf.ru: поиск по наименованию в судах общей юрисдикции региона регистрации. '
+                    'Арбитражные дела не включены.'
+        }
+
+        if not inn or not self.get_hosts(inn):
+            result['note'] = 'Для региона компании не настроены сайты судов (SUDRF_HOSTS).'
+            return result
+
+        party = await self._party(inn)
+        if not party:
+            result['note'] = 'Наименование компании неизвестно, поиск на sudrf.ru невозможен.'
             return result
-            
+
+        try:
+            # Partial results are kept for paging too, for the result set TTL
+            found = await result_sets.get(
+                'court', inn, lambda: self._get_all_cases(inn, party, background), background
+            )
         except Exception as e:
             logger.error(f"Error searching court cases: {e}")
-            return {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'cases': [],
-                'error': str(e),
-                'note': 'Произошла ошибка при получении данных с sudrf.ru'
-            }
-    
-    def _parse_mock_cases(self, inn: str = None, company_name: str = None) -> List[Dict]:
-        """
-        Mock parser for demonstration purposes.
-        In production, implement actual parsing logic or API integration.
-        """
-        # Return empty list as we need actual API or complex parsing
-        return []
-    
+            result['error'] = str(e)
+            result['note'] = 'Произошла ошибка при получении данных с sudrf.ru'
+            return result
+
+        result['total'] = len(found['cases'])
+        result['cases'] = page_slice(found['cases'], page, per_page)
+        if found['partial']:
+            result['partial'] = True
+            result['note'] = 'Часть сайтов судов не ответила вовремя, список может быть неполным.'
+        return result
+
     def get_case_details(self, case_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific case."""
         try:
@@ -81,6 +295,10 @@ class CourtCasesService:
             logger.error(f"Error getting case details: {e}")
             return None
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Get crawler and cache metrics."""
+        return {**self.stats, 'cache': self.cache.get_stats()}
+
 
 # Global service instance
 court_service = CourtCasesService()
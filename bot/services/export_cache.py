@@ -0,0 +1,65 @@
+"""Telegram file_id cache for exported PDFs."""
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Any, Dict, Optional
+from config import config
+from bot.services.cache import TwoTierCache
+from bot.services.pdf_pool import compact_payload
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCache:
+    """
+    Map exported PDF contents to the Telegram file_id of the sent document.
+
+    Keys are content hashes of the rendered company fields plus the
+    report type and the export day, so a changed DaData snapshot produces
+    a new key and a fresh render: file_ids of outdated reports are never
+    served, and a reused PDF never shows an export date of another day.
+    """
+
+    def __init__(self, ttl: int, max_items: int = 1024):
+        """Initialize cache."""
+        self.cache = TwoTierCache('export', ttl=ttl, max_items=max_items)
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stored': 0,
+            'rejected_file_ids': 0,
+        }
+
+    def key(self, company_data: Dict[str, Any], report: str) -> str:
+        """Content hash of the company fields rendered into `report` today."""
+        payload = json.dumps(compact_payload(company_data), sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode())
+        digest.update(b'\0' + report.encode())
+        # The PDF prints its export date (pdf_export uses local time too)
+        digest.update(b'\0' + date.today().isoformat().encode())
+        return digest.hexdigest()
+
+    async def get_file_id(self, key: str) -> Optional[str]:
+        """Get file_id of an already sent PDF."""
+        file_id, _ = await self.cache.get(key)
+        self.stats['hits' if file_id else 'misses'] += 1
+        return file_id
+
+    async def store(self, key: str, file_id: str):
+        """Remember file_id returned by Telegram for the sent PDF."""
+        await self.cache.set(key, file_id)
+        self.stats['stored'] += 1
+
+    async def forget(self, key: str):
+        """Drop file_id that Telegram no longer accepts."""
+        self.stats['rejected_file_ids'] += 1
+        await self.cache.delete(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        return {**self.stats, 'cache': self.cache.get_stats()}
+
+
+# Global cache instance
+export_cache = ExportCache(ttl=config.EXPORT_CACHE_TTL, max_items=config.EXPORT_CACHE_MAX_ITEMS)
@@ -1,8 +1,14 @@
 """MCP DaData integration service - STRICT data source."""
+import asyncio
 import logging
-from typing import Optional, Dict, Any
-import requests
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from config import config
+from bot.services.cache import TwoTierCache
+from bot.services.resilience import UpstreamUnavailable, get_upstream, is_transient_http_error
+from bot.services.singleflight import create_single_flight
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
@@ -28,60 +34,196 @@ class MCPDaDataService:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        
+        # Shared HTTP session (created lazily inside the running event loop)
+        self.pool_size = config.DADATA_POOL_SIZE
+        self.timeout = config.DADATA_TIMEOUT
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Normalized results cache (LRU + Redis)
+        self.cache = TwoTierCache(
+            'company',
+            ttl=config.COMPANY_CACHE_TTL,
+            stale_ttl=config.COMPANY_CACHE_STALE_TTL,
+            max_items=config.COMPANY_CACHE_MAX_ITEMS
+        )
+        self._refreshing = set()
+        self._background_tasks = set()
+        
+        # Coalesce concurrent lookups of the same INN/OGRN
+        self._flight = create_single_flight('dadata', distributed=True)
+        
+        # Breaker, retries and hedging of findById requests
+        self.upstream = get_upstream(
+            'dadata',
+            hedge_percentile=config.DADATA_HEDGE_PERCENTILE or None,
+            retryable=is_transient_http_error
+        )
+    
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        """Get shared keep-alive session bound to the current event loop."""
+        # Imported on first request to keep cold start light
+        import aiohttp
+        
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # A session cannot be reused across event loops, so a stale one is dropped
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=config.DADATA_KEEPALIVE,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """Close shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
     
-    def find_by_inn(self, inn: str) -> Optional[Dict[str, Any]]:
+    async def _find_by_id(self, query: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Query DaData findById/party and return the first suggestion."""
+        import aiohttp
+        
+        session = await self._get_session()
+        url = f"{self.base_url}/findById/party"
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        
+        async with session.post(url, json={"query": query}, timeout=request_timeout) as response:
+            response.raise_for_status()
+            result = await response.json()
+        
+        if result.get('suggestions'):
+            return result['suggestions'][0]
+        return None
+    
+    async def _lookup(self, kind: str, query: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
-        Find company by INN through MCP DaData.
+        Fetch and normalize company from DaData, bypassing the cache.
         
-        Returns ONLY factual data from DaData.
+        Raises:
+            UpstreamUnavailable: DaData did not answer (None means not found)
         """
+        label = kind.upper()
+        logger.info(f"Querying MCP DaData for {label}: {query}")
         try:
-            url = f"{self.base_url}/findById/party"
-            data = {"query": inn}
-            
-            logger.info(f"Querying MCP DaData for INN: {inn}")
-            response = requests.post(url, json=data, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get('suggestions'):
-                company_data = result['suggestions'][0]
-                logger.info(f"Found company via MCP DaData: {inn}")
-                return self._normalize_company_data(company_data)
-            
-            logger.warning(f"Company not found for INN: {inn}")
+            company_data = await self.upstream.call(lambda: self._find_by_id(query, timeout))
+        except UpstreamUnavailable as e:
+            logger.error(f"MCP DaData unavailable for {label} {query}: {e.reason}")
+            raise
+        except Exception as e:
+            # Rejected request (key, quota): no answer about the company either
+            logger.error(f"Error querying MCP DaData for {label} {query}: {e}")
+            raise UpstreamUnavailable('dadata', repr(e)) from e
+        
+        if not company_data:
+            logger.warning(f"Company not found for {label}: {query}")
             return None
-            
+        
+        logger.info(f"Found company via MCP DaData: {query}")
+        try:
+            return self._normalize_company_data(company_data)
         except Exception as e:
-            logger.error(f"Error querying MCP DaData for INN {inn}: {e}")
+            logger.error(f"Error normalizing MCP DaData result for {label} {query}: {e}")
             return None
     
-    def find_by_ogrn(self, ogrn: str) -> Optional[Dict[str, Any]]:
+    async def _store(self, kind: str, query: str, company: Dict[str, Any]):
+        """Store normalized company under its lookup key and its INN."""
+        await self.cache.set(f"{kind}:{query}", company)
+        inn = company.get('data', {}).get('inn')
+        if kind != 'inn' and inn and inn != 'нет данных':
+            await self.cache.set(f"inn:{inn}", company)
+    
+    async def _fetch_and_store(self, kind: str, query: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Fetch company from DaData and cache it."""
+        company = await self._lookup(kind, query, timeout)
+        if company:
+            await self._store(kind, query, company)
+        return company
+    
+    async def _peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read cached value published by another process."""
+        value, _ = await self.cache.get(key)
+        return value
+    
+    async def _fetch_coalesced(self, kind: str, query: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Fetch company once for all concurrent callers of the same key."""
+        key = f"{kind}:{query}"
+        return await self._flight.do(
+            key,
+            lambda: self._fetch_and_store(kind, query, timeout),
+            recheck=lambda: self._peek(key)
+        )
+    
+    async def _refresh(self, kind: str, query: str):
+        """Revalidate stale cache entry in background."""
+        try:
+            await self._fetch_coalesced(kind, query)
+        except UpstreamUnavailable:
+            # Stale entry keeps being served until DaData is back
+            pass
+        finally:
+            self._refreshing.discard(f"{kind}:{query}")
+    
+    def _schedule_refresh(self, kind: str, query: str):
+        """Schedule background revalidation unless one is already running."""
+        key = f"{kind}:{query}"
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(kind, query))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _cached_lookup(self, kind: str, query: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Serve lookup from cache, falling back to DaData on miss."""
+        cached, fresh = await self.cache.get(f"{kind}:{query}")
+        if cached is not None:
+            if not fresh:
+                self._schedule_refresh(kind, query)
+            return cached
+        
+        return await self._fetch_coalesced(kind, query, timeout)
+    
+    async def find_by_inn(self, inn: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find company by INN through MCP DaData.
+        
+        Returns ONLY factual data from DaData. Results are served from
+        the company cache when available; treat them as read-only.
+        
+        Args:
+            inn: Company INN
+            timeout: Per-attempt deadline in seconds (defaults to DADATA_TIMEOUT)
+        
+        Raises:
+            UpstreamUnavailable: DaData is down; None means the company was not found
+        """
+        return await self._cached_lookup('inn', inn, timeout)
+    
+    async def find_by_ogrn(self, ogrn: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Find company by OGRN through MCP DaData.
         
-        Returns ONLY factual data from DaData.
+        Returns ONLY factual data from DaData. Results are served from
+        the company cache when available; treat them as read-only.
+        
+        Args:
+            ogrn: Company OGRN
+            timeout: Per-attempt deadline in seconds (defaults to DADATA_TIMEOUT)
+        
+        Raises:
+            UpstreamUnavailable: DaData is down; None means the company was not found
         """
-        try:
-            url = f"{self.base_url}/findById/party"
-            data = {"query": ogrn}
-            
-            logger.info(f"Querying MCP DaData for OGRN: {ogrn}")
-            response = requests.post(url, json=data, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get('suggestions'):
-                company_data = result['suggestions'][0]
-                logger.info(f"Found company via MCP DaData: {ogrn}")
-                return self._normalize_company_data(company_data)
-            
-            logger.warning(f"Company not found for OGRN: {ogrn}")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error querying MCP DaData for OGRN {ogrn}: {e}")
-            return None
+        return await self._cached_lookup('ogrn', ogrn, timeout)
     
     def _normalize_company_data(self, raw_data: Dict) -> Dict[str, Any]:
         """
@@ -155,13 +297,13 @@ class MCPDaDataService:
         
         return normalized
     
-    def get_company_finances(self, inn: str) -> Dict[str, Any]:
+    async def get_company_finances(self, inn: str) -> Dict[str, Any]:
         """
         Get financial data for company.
         
         Note: Financial data may require paid DaData subscription.
         """
-        company = self.find_by_inn(inn)
+        company = await self.find_by_inn(inn)
         if not company:
             return {'error': 'Company not found'}
         
@@ -176,6 +318,13 @@ class MCPDaDataService:
             'available': True,
             'data': finance
         }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache and request coalescing metrics."""
+        return {
+            'cache': self.cache.get_stats(),
+            'singleflight': self._flight.get_stats(),
+        }
 
 
 # Global service instance
@@ -0,0 +1,172 @@
+"""PDF rendering off the event loop in a bounded worker pool."""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Company fields read by PDFExportService; everything else stays in the parent
+_PDF_FIELDS = ('inn', 'ogrn', 'kpp', 'name', 'state', 'management', 'founders', 'address', 'okved', 'okveds')
+
+
+class PDFPoolBusy(Exception):
+    """Raised when the render queue is full."""
+
+
+class PDFRenderTimeout(Exception):
+    """Raised when a render job does not finish in time."""
+
+
+def compact_payload(company_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the fields rendered into PDFs (no raw DaData response)."""
+    data = company_data.get('data', {})
+    return {'data': {key: data[key] for key in _PDF_FIELDS if key in data}}
+
+
+def _init_worker():
+    # Build styles once per worker instead of on the first job
+    from bot.services.pdf_export import pdf_service  # noqa: F401
+
+
+def _render_job(kind: str, payload: Dict[str, Any], screen_name: Optional[str]) -> Tuple[bytes, float, float]:
+    """Render PDF in a worker; returns (pdf, wall-clock start, render seconds)."""
+    from bot.services.pdf_export import pdf_service
+
+    started_at = time.time()
+    started = time.perf_counter()
+    if kind == 'full':
+        buffer = pdf_service.export_full_report(payload)
+    else:
+        buffer = pdf_service.export_company_screen(payload, screen_name)
+    return buffer.getvalue(), started_at, time.perf_counter() - started
+
+
+class PDFRenderPool:
+    """
+    Render PDFs in worker processes.
+
+    Jobs receive a compact company payload and return PDF bytes. At most
+    `max_queue` jobs may be pending (running or waiting for a worker);
+    further jobs are rejected with PDFPoolBusy. Callers stop waiting
+    after `timeout` seconds (PDFRenderTimeout), while the job still holds
+    its queue slot until the worker is done with it. With `workers=0`
+    rendering runs in a single background thread instead, for platforms
+    without multiprocessing.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, timeout: float = 30.0):
+        """Initialize pool (workers start on first render)."""
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'queue_wait_seconds': 0.0,
+            'render_seconds': 0.0,
+            'max_render_seconds': 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                # multiprocessing is imported on first export only
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # spawn: forking a process that runs the event loop thread is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-render')
+            logger.info(f"Started PDF render pool with {self.workers or 'thread'} workers")
+        return self._executor
+
+    def _job_done(self, submitted_at: float, future):
+        self._pending -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.stats['failed'] += 1
+            if isinstance(future.exception(), BrokenExecutor):
+                # A worker died (e.g. OOM-killed); start a fresh pool next time
+                self._executor = None
+            return
+
+        _, started_at, render_seconds = future.result()
+        self.stats['completed'] += 1
+        self.stats['queue_wait_seconds'] += max(0.0, started_at - submitted_at)
+        self.stats['render_seconds'] += render_seconds
+        self.stats['max_render_seconds'] = max(self.stats['max_render_seconds'], render_seconds)
+
+    async def _render(self, kind: str, company_data: Dict[str, Any], screen_name: Optional[str] = None) -> bytes:
+        if self._pending >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise PDFPoolBusy(f"{self._pending} PDF jobs pending")
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        try:
+            future = loop.run_in_executor(
+                self._get_executor(), _render_job, kind, compact_payload(company_data), screen_name
+            )
+        except BrokenExecutor:
+            self._executor = None
+            raise
+
+        self._pending += 1
+        self.stats['submitted'] += 1
+        future.add_done_callback(functools.partial(self._job_done, submitted_at))
+
+        try:
+            # shield: on timeout the job keeps its slot until the worker finishes
+            pdf, _, _ = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise PDFRenderTimeout(f"PDF rendering took longer than {self.timeout}s")
+        return pdf
+
+    async def render_screen(self, company_data: Dict[str, Any], screen_name: str) -> bytes:
+        """Render one company screen to PDF bytes."""
+        return await self._render('screen', company_data, screen_name)
+
+    async def render_full_report(self, company_data: Dict[str, Any]) -> bytes:
+        """Render full company report to PDF bytes."""
+        return await self._render('full', company_data)
+
+    def shutdown(self):
+        """Stop workers, dropping jobs that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool metrics."""
+        completed = self.stats['completed']
+        return {
+            **self.stats,
+            'pending': self._pending,
+            'avg_queue_wait_ms': self.stats['queue_wait_seconds'] / completed * 1000 if completed else 0.0,
+            'avg_render_ms': self.stats['render_seconds'] / completed * 1000 if completed else 0.0,
+        }
+
+
+# Global pool instance
+pdf_pool = PDFRenderPool(
+    workers=config.PDF_POOL_WORKERS,
+    max_queue=config.PDF_POOL_QUEUE_SIZE,
+    timeout=config.PDF_RENDER_TIMEOUT
+)
@@ -0,0 +1,277 @@
+"""Shared user_data for stateless instances."""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from telegram.ext import BasePersistence, PersistenceInput
+from config import config
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def slim_user_data(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the raw DaData response from the stored company."""
+    company = user_data.get('company')
+    if isinstance(company, dict) and 'raw' in company:
+        user_data = {**user_data, 'company': {k: v for k, v in company.items() if k != 'raw'}}
+    return user_data
+
+
+class RedisStateBackend:
+    """Redis storage shared across instances."""
+
+    def __init__(self, ttl: int):
+        """Initialize backend."""
+        self.ttl = ttl
+
+    def _redis(self):
+        redis = get_redis()
+        if redis is None:
+            raise RuntimeError("Redis is not available")
+        return redis
+
+    async def load_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        raw = await self._redis().get(f"persist:user:{user_id}")
+        return json.loads(raw) if raw else None
+
+    async def save_users(self, users: Dict[int, Optional[Dict[str, Any]]]):
+        pipe = self._redis().pipeline(transaction=False)
+        for user_id, data in users.items():
+            key = f"persist:user:{user_id}"
+            if data is None:
+                pipe.delete(key)
+            else:
+                pipe.set(key, json.dumps(data, ensure_ascii=False, default=str), ex=self.ttl)
+        await pipe.execute()
+
+
+class SQLiteStateBackend:
+    """SQLite storage for single-host deployments."""
+
+    def __init__(self, ttl: int, path: str):
+        """Initialize backend and create schema."""
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS persist_user_data ("
+                "user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _load_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM persist_user_data WHERE user_id = ? AND updated_at > ?",
+                (user_id, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save_users(self, users: Dict[int, Optional[Dict[str, Any]]]):
+        now = time.time()
+        with self._lock:
+            for user_id, data in users.items():
+                if data is None:
+                    self._conn.execute("DELETE FROM persist_user_data WHERE user_id = ?", (user_id,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO persist_user_data (user_id, data, updated_at) VALUES (?, ?, ?)",
+                        (user_id, json.dumps(data, ensure_ascii=False, default=str), now)
+                    )
+            self._conn.commit()
+
+    async def _run(self, func, *args):
+        try:
+            future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        except RuntimeError:
+            # Flushing from an atexit hook: thread pools no longer accept work
+            return func(*args)
+        return await future
+
+    async def load_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self._load_user, user_id)
+
+    async def save_users(self, users: Dict[int, Optional[Dict[str, Any]]]):
+        await self._run(self._save_users, users)
+
+
+class BotPersistence(BasePersistence):
+    """
+    Persist user_data (search state and the last opened company).
+
+    user_data is loaded lazily: the first update of a user on an instance
+    reads it from the backend, later updates use the local copy until it
+    is older than `refresh_ttl` seconds. Changes are written behind: the
+    Application hands dirty entries over every `update_interval` seconds
+    and they are saved in one batch per backend. Serverless instances
+    cannot wait for that and flush after each update (see BotRuntime).
+    """
+
+    def __init__(self, backend, update_interval: float = 2.0, refresh_ttl: float = 30.0,
+                 max_users: int = 10000):
+        """Initialize persistence."""
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.backend = backend
+        self.refresh_ttl = refresh_ttl
+        self.max_users = max_users
+
+        self._loaded_at: OrderedDict = OrderedDict()
+        self._dirty_users: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'loads': 0,
+            'saved_users': 0,
+            'flushes': 0,
+            'errors': 0,
+        }
+
+    def _touch(self, user_id: int):
+        self._loaded_at[user_id] = time.monotonic()
+        self._loaded_at.move_to_end(user_id)
+        while len(self._loaded_at) > self.max_users:
+            self._loaded_at.popitem(last=False)
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            # Runs after the Application queued all dirty entries of this round
+            self._flush_task = asyncio.ensure_future(self._flush_dirty())
+
+    async def _flush_dirty(self):
+        users, self._dirty_users = self._dirty_users, {}
+
+        try:
+            if users:
+                await self.backend.save_users(users)
+                self.stats['saved_users'] += len(users)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error saving bot state: {e}")
+            # Retry on next run unless newer values were queued meanwhile
+            for user_id, data in users.items():
+                self._dirty_users.setdefault(user_id, data)
+
+    async def get_user_data(self) -> Dict[int, Dict[Any, Any]]:
+        # Loaded per user in refresh_user_data
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, Dict[Any, Any]]:
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict[Any, object]:
+        # No persistent ConversationHandler: search state lives in user_data
+        return {}
+
+    async def update_conversation(self, name: str, key: Any, new_state: Optional[object]):
+        pass
+
+    async def update_user_data(self, user_id: int, data: Dict[Any, Any]):
+        self._dirty_users[user_id] = slim_user_data(data)
+        self._touch(user_id)
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int):
+        self._dirty_users[user_id] = None
+        self._loaded_at.pop(user_id, None)
+        self._schedule_flush()
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[Any, Any]):
+        loaded_at = self._loaded_at.get(user_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_ttl:
+            return
+        if user_id in self._dirty_users:
+            # Local changes are newer than the stored copy
+            return
+
+        try:
+            data = await self.backend.load_user(user_id)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error loading user_data for {user_id}: {e}")
+            return
+
+        self.stats['loads'] += 1
+        self._touch(user_id)
+        if data is not None:
+            user_data.clear()
+            user_data.update(data)
+
+    async def update_chat_data(self, chat_id: int, data: Dict[Any, Any]):
+        pass
+
+    async def update_bot_data(self, data: Dict[Any, Any]):
+        pass
+
+    async def update_callback_data(self, data: Any):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict[Any, Any]):
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict[Any, Any]):
+        pass
+
+    async def flush(self):
+        """Save all pending changes (called on Application shutdown and after serverless updates)."""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        if self._dirty_users:
+            await self._flush_dirty()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get persistence counters."""
+        return {
+            **self.stats,
+            'cached_users': len(self._loaded_at),
+            'pending_users': len(self._dirty_users),
+        }
+
+
+def create_persistence() -> Optional[BotPersistence]:
+    """Create persistence for configured PERSISTENCE backend (auto, redis, sqlite or none)."""
+    backend = config.PERSISTENCE
+    if backend == 'none':
+        return None
+
+    if backend == 'auto':
+        backend = 'redis' if config.REDIS_URL else 'sqlite'
+    elif backend == 'redis' and not config.REDIS_URL:
+        logger.warning("PERSISTENCE=redis but REDIS_URL is not set, using SQLite")
+        backend = 'sqlite'
+    elif backend not in ('redis', 'sqlite'):
+        logger.warning(f"Unknown PERSISTENCE '{backend}', using SQLite")
+        backend = 'sqlite'
+
+    if backend == 'redis':
+        store = RedisStateBackend(config.USER_DATA_TTL)
+    else:
+        store = SQLiteStateBackend(config.USER_DATA_TTL, config.SQLITE_PATH)
+
+    return BotPersistence(
+        store,
+        update_interval=config.PERSISTENCE_FLUSH_INTERVAL,
+        refresh_ttl=config.PERSISTENCE_REFRESH_TTL
+    )
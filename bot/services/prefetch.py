@@ -0,0 +1,117 @@
+"""Speculative background prefetch of company sub-screens."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+async def _prefetch_courts(inn: str, company_data: Dict[str, Any]):
+    # Loaded here: the court parser stays off the import path of the card
+    from bot.services.court import court_service
+    await court_service.search_cases(inn=inn, background=True)
+
+
+async def _prefetch_procurement(inn: str, company_data: Dict[str, Any]):
+    from bot.services.procurement import procurement_service
+    await procurement_service.search_procurements(inn=inn, page=1)
+
+
+# Screens usually opened next from the company card. Finances and
+# requisites are rendered from the company record already in cache.
+JOBS: Dict[str, Callable[[str, Dict[str, Any]], Awaitable[None]]] = {
+    'court': _prefetch_courts,
+    'procurement': _prefetch_procurement,
+}
+
+
+class Prefetcher:
+    """
+    Warm result caches of screens a user is likely to open next.
+
+    Prefetch is low priority: at most `max_tasks` jobs run at once (jobs
+    over the budget are dropped, not queued), and when the runtime
+    reports more than `max_load` queued or running updates, new jobs
+    are skipped and running ones are cancelled.
+    """
+
+    def __init__(self, enabled: bool = True, max_tasks: int = 4, max_load: int = 8):
+        """Initialize prefetcher."""
+        self.enabled = enabled
+        self.max_tasks = max_tasks
+        self.max_load = max_load
+        self.load = 0
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.stats = {
+            'scheduled': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'skipped_budget': 0,
+            'skipped_load': 0,
+        }
+
+    @property
+    def overloaded(self) -> bool:
+        return self.load > self.max_load
+
+    def report_load(self, load: int):
+        """Update current load (queued plus running updates), shedding prefetch when over the limit."""
+        self.load = load
+        if self.overloaded and self._tasks:
+            logger.info(f"Load {load} over {self.max_load}, cancelling {len(self._tasks)} prefetch jobs")
+            self.cancel_all()
+
+    def schedule(self, inn: str, company_data: Optional[Dict[str, Any]]):
+        """Start prefetch jobs for company screens; never blocks the caller."""
+        if not self.enabled or not company_data:
+            return
+        for name, job in JOBS.items():
+            key = (name, inn)
+            if key in self._tasks:
+                continue
+            if self.overloaded:
+                self.stats['skipped_load'] += 1
+                continue
+            if len(self._tasks) >= self.max_tasks:
+                self.stats['skipped_budget'] += 1
+                continue
+            self.stats['scheduled'] += 1
+            task = asyncio.create_task(self._run(name, job, inn, company_data), name=f'prefetch-{name}-{inn}')
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+
+    def _forget(self, key: Tuple[str, str], task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def _run(self, name: str, job: Callable[[str, Dict[str, Any]], Awaitable[None]],
+                   inn: str, company_data: Dict[str, Any]):
+        try:
+            await job(inn, company_data)
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.warning(f"Prefetch of {name} for {inn} failed: {e}")
+        else:
+            self.stats['completed'] += 1
+
+    def cancel_all(self):
+        """Cancel running prefetch jobs."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job counters."""
+        return {**self.stats, 'running': len(self._tasks), 'load': self.load}
+
+
+# Global prefetcher instance
+prefetcher = Prefetcher(
+    enabled=config.PREFETCH_ENABLED,
+    max_tasks=config.PREFETCH_MAX_TASKS,
+    max_load=config.PREFETCH_MAX_LOAD
+)
@@ -1,71 +1,118 @@
-"""Government procurement parser for zakupki.gov.ru."""
+"""Government procurement search in the local zakupki.gov.ru index."""
+import asyncio
 import logging
+import os
 from typing import List, Dict, Any, Optional
-import requests
-from bs4 import BeautifulSoup
+from config import config
+from bot.services.procurement_index import ProcurementIndex
+from bot.services.result_sets import page_slice, result_sets
 
 logger = logging.getLogger(__name__)
 
+ROLE_NAMES = {
+    'customer': 'Заказчик',
+    'supplier': 'Поставщик',
+    'placer': 'Размещающая организация',
+}
+
+
+def _format_date(value: str) -> str:
+    if len(value) == 10:
+        year, month, day = value.split('-')
+        return f"{day}.{month}.{year}"
+    return value or 'Н/Д'
+
+
+def _format_sum(value: Optional[float]) -> str:
+    if value is None:
+        return 'Н/Д'
+    return f"{value:,.2f}".replace(',', ' ').replace('.', ',') + ' ₽'
+
 
 class ProcurementService:
-    """Service for parsing government procurement from zakupki.gov.ru."""
-    
-    def __init__(self):
+    """
+    Service for government procurement data.
+
+    Contracts and notices come from the local index built from the
+    official zakupki.gov.ru bulk XML dumps (see ingest_procurement.py),
+    so searches never hit the portal.
+    """
+
+    def __init__(self, db_path: str = None):
         """Initialize procurement service."""
-        self.base_url = "https://zakupki.gov.ru"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-    
-    def search_procurements(self, inn: str = None, company_name: str = None, 
-                           page: int = 1, per_page: int = 10) -> Dict[str, Any]:
-        """
-        Search for government procurements (best-effort parsing).
-        
-        Note: zakupki.gov.ru has anti-scraping measures and complex structure.
-        """
-        try:
-            # Mock implementation - in production, this would need:
-            # 1. Proper API integration (zakupki.gov.ru has official API)
-            # 2. OAuth authentication
-            # 3. Complex request signing
-            # 4. Rate limiting handling
-            
-            result = {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'procurements': [],
-                'note': 'Для получения актуальных данных о госзакупках рекомендуется использовать официальный API zakupki.gov.ru. '
-                       'Требуется регистрация и получение ключей доступа на портале https://zakupki.gov.ru.'
-            }
-            
-            # Try to get data (best-effort)
-            result['procurements'] = self._parse_mock_procurements(inn, company_name)
-            result['total'] = len(result['procurements'])
-            
+        self.db_path = db_path or config.PROCUREMENT_DB_PATH
+        self.max_rows = config.RESULT_SET_MAX_ROWS
+        self._index: Optional[ProcurementIndex] = None
+        self.stats = {
+            'searches': 0,
+            'errors': 0,
+        }
+
+    def _get_index(self) -> Optional[ProcurementIndex]:
+        """Open index on first use; None until dumps have been ingested."""
+        if self._index is None and os.path.exists(self.db_path):
+            self._index = ProcurementIndex(self.db_path)
+        return self._index
+
+    def _format_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'number': item['number'],
+            'kind': 'Контракт' if item['kind'] == 'contract' else 'Закупка',
+            'date': _format_date(item['date']),
+            'sum': _format_sum(item['sum']),
+            'status': item['status'] or 'Н/Д',
+            'subject': item['subject'],
+            'customer': item['customer_name'],
+            'role': ', '.join(ROLE_NAMES.get(role, role) for role in item['roles']),
+        }
+
+    async def _fetch_all(self, index: ProcurementIndex, inn: str, kind: Optional[str]) -> Dict[str, Any]:
+        """Exact total and the first `max_rows` documents of INN."""
+        total, items = await asyncio.to_thread(index.search, inn, 1, self.max_rows, kind)
+        return {'total': total, 'items': [self._format_item(item) for item in items]}
+
+    async def _search(self, key: str, inn: str, page: int, per_page: int,
+                      kind: Optional[str] = None) -> Dict[str, Any]:
+        self.stats['searches'] += 1
+        result = {
+            'total': 0,
+            'page': page,
+            'per_page': per_page,
+            key: [],
+            'note': 'Данные из выгрузок zakupki.gov.ru (44-ФЗ).'
+        }
+
+        index = self._get_index()
+        if index is None:
+            result['note'] = 'Индекс госзакупок ещё не загружен (ingest_procurement.py).'
             return result
-            
+
+        try:
+            found = await result_sets.get(f"procurement:{kind or 'all'}", inn,
+                                          lambda: self._fetch_all(index, inn, kind))
+            items = found['items']
+            if page * per_page <= len(items) or found['total'] <= len(items):
+                items = page_slice(items, page, per_page)
+            else:
+                # Past the cached rows of a very large result set
+                _, rows = await asyncio.to_thread(index.search, inn, page, per_page, kind)
+                items = [self._format_item(item) for item in rows]
         except Exception as e:
+            self.stats['errors'] += 1
             logger.error(f"Error searching procurements: {e}")
-            return {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'procurements': [],
-                'error': str(e),
-                'note': 'Произошла ошибка при получении данных с zakupki.gov.ru'
-            }
-    
-    def _parse_mock_procurements(self, inn: str = None, company_name: str = None) -> List[Dict]:
-        """
-        Mock parser for demonstration purposes.
-        In production, implement actual API integration.
-        """
-        # Return empty list as we need actual API integration
-        return []
-    
+            result['error'] = str(e)
+            result['note'] = 'Произошла ошибка при поиске в индексе госзакупок'
+            return result
+
+        result['total'] = found['total']
+        result[key] = items
+        return result
+
+    async def search_procurements(self, inn: str = None, company_name: str = None,
+                                  page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+        """Search contracts and notices where company is customer or supplier."""
+        return await self._search('procurements', inn, page, per_page)
+
     def get_procurement_details(self, procurement_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific procurement."""
         try:
@@ -78,28 +125,14 @@ class ProcurementService:
         except Exception as e:
             logger.error(f"Error getting procurement details: {e}")
             return None
-    
-    def get_contracts(self, inn: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+
+    async def get_contracts(self, inn: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
         """Get contracts for a company by INN."""
-        try:
-            result = {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'contracts': [],
-                'note': 'Требуется интеграция с API zakupki.gov.ru'
-            }
-            
-            return result
-        except Exception as e:
-            logger.error(f"Error getting contracts: {e}")
-            return {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'contracts': [],
-                'error': str(e)
-            }
+        return await self._search('contracts', inn, page, per_page, kind='contract')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get search counters."""
+        return {**self.stats, 'index_loaded': self._index is not None}
 
 
 # Global service instance
@@ -0,0 +1,239 @@
+"""Local SQLite index of zakupki.gov.ru bulk XML dumps."""
+import logging
+import os
+import sqlite3
+import threading
+import zipfile
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# currentContractStage codes of contract dumps
+CONTRACT_STAGES = {
+    'E': 'Исполнение',
+    'EC': 'Исполнение завершено',
+    'ET': 'Исполнение прекращено',
+    'IN': 'Аннулирован',
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS procurements ("
+    "id TEXT PRIMARY KEY, kind TEXT NOT NULL, number TEXT NOT NULL, date TEXT, sum REAL, "
+    "status TEXT, subject TEXT, customer_inn TEXT, customer_name TEXT, source TEXT)",
+    "CREATE TABLE IF NOT EXISTS procurement_parties ("
+    "inn TEXT NOT NULL, date TEXT NOT NULL, doc_id TEXT NOT NULL, role TEXT NOT NULL, "
+    "PRIMARY KEY (inn, date, doc_id, role)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS procurement_parties_doc ON procurement_parties (doc_id)",
+)
+
+# Record = (procurement row, [(inn, role)])
+Record = Tuple[Tuple[Any, ...], List[Tuple[str, str]]]
+
+
+def _text(elem, *paths: str) -> Optional[str]:
+    """First non-empty text among namespace-agnostic paths."""
+    for path in paths:
+        value = elem.findtext(path)
+        if value and value.strip():
+            return value.strip()
+    return None
+
+
+def _date(value: Optional[str]) -> str:
+    # xs:date / xs:dateTime with optional timezone -> YYYY-MM-DD
+    return value[:10] if value else ''
+
+
+def _sum(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_contract(elem, source: str) -> Optional[Record]:
+    """Extract contract with its customer and supplier INNs."""
+    number = _text(elem, '{*}regNum')
+    if not number:
+        return None
+
+    customer_inn = _text(elem, '{*}customer/{*}inn', '{*}customer/{*}INN')
+    parties = [(customer_inn, 'customer')] if customer_inn else []
+    for supplier in elem.iterfind('.//{*}suppliers/{*}supplier'):
+        inn = _text(supplier, './/{*}INN', './/{*}inn')
+        if inn:
+            parties.append((inn, 'supplier'))
+
+    date = _date(_text(elem, '{*}signDate', '{*}publishDate'))
+    stage = _text(elem, '{*}currentContractStage')
+    row = (
+        f"contract:{number}", 'contract', number, date,
+        _sum(_text(elem, '{*}priceInfo/{*}price', '{*}price')),
+        CONTRACT_STAGES.get(stage, stage),
+        _text(elem, '{*}contractSubject', './/{*}products/{*}product/{*}name', './/{*}product/{*}OKPD2/{*}name'),
+        customer_inn,
+        _text(elem, '{*}customer/{*}fullName', '{*}customer/{*}shortName'),
+        source,
+    )
+    return row, parties
+
+
+def parse_notice(elem, source: str) -> Optional[Record]:
+    """Extract purchase notice with its placer and customer INNs."""
+    number = _text(elem, '{*}purchaseNumber', './/{*}purchaseNumber')
+    if not number:
+        return None
+
+    parties = []
+    for path, role in (('.//{*}customer/{*}INN', 'customer'), ('.//{*}responsibleOrg/{*}INN', 'placer')):
+        for inn in elem.iterfind(path):
+            if inn.text and inn.text.strip():
+                parties.append((inn.text.strip(), role))
+
+    date = _date(_text(elem, '{*}docPublishDate', './/{*}publishDTInEIS', './/{*}docPublishDTInEIS'))
+    row = (
+        f"notice:{number}", 'notice', number, date,
+        _sum(_text(elem, './/{*}maxPrice')),
+        'Извещение',
+        _text(elem, '{*}purchaseObjectInfo', './/{*}purchaseObjectInfo'),
+        parties[0][0] if parties else None,
+        _text(elem, './/{*}customer/{*}fullName', './/{*}responsibleOrg/{*}fullName'),
+        source,
+    )
+    return row, list(dict.fromkeys(parties))
+
+
+def _record_parser(tag: str):
+    if tag == 'contract':
+        return parse_contract
+    if tag.startswith(('fcsNotification', 'epNotification')):
+        return parse_notice
+    return None
+
+
+def iter_records(stream: IO[bytes], source: str) -> Iterator[Record]:
+    """
+    Stream records of one dump XML in constant memory.
+
+    Children of the root element are parsed when they end and cleared
+    right after, together with the already processed siblings.
+    """
+    for _, elem in etree.iterparse(stream, events=('end',), huge_tree=True):
+        # Records are children of the root <export> element
+        parent = elem.getparent()
+        if parent is None or parent.getparent() is not None:
+            continue
+
+        parser = _record_parser(etree.QName(elem).localname) if isinstance(elem.tag, str) else None
+        record = parser(elem, source) if parser is not None else None
+        if record is not None:
+            yield record
+
+        elem.clear()
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def iter_dump(path: str) -> Iterator[Record]:
+    """Stream records of a dump: an XML file or a zip archive of XML files."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.lower().endswith('.xml'):
+                    with archive.open(name) as stream:
+                        yield from iter_records(stream, f"{os.path.basename(path)}/{name}")
+    else:
+        with open(path, 'rb') as stream:
+            yield from iter_records(stream, os.path.basename(path))
+
+
+class ProcurementIndex:
+    """
+    Contracts and notices indexed by participant INN.
+
+    A company's documents are read from the (inn, date) primary key of
+    procurement_parties, so counting and paging one INN touches only its
+    own rows.
+    """
+
+    def __init__(self, path: str):
+        """Open (and create) index database."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+
+    def _write_batch(self, batch: List[Record]):
+        ids = [(row[0],) for row, _ in batch]
+        with self._lock:
+            # Newer dumps replace a document together with its participants
+            self._conn.executemany("DELETE FROM procurement_parties WHERE doc_id = ?", ids)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO procurements "
+                "(id, kind, number, date, sum, status, subject, customer_inn, customer_name, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row, _ in batch]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO procurement_parties (inn, date, doc_id, role) VALUES (?, ?, ?, ?)",
+                [(inn, row[3], row[0], role) for row, parties in batch for inn, role in parties]
+            )
+            self._conn.commit()
+
+    def ingest(self, records: Iterable[Record], batch_size: int = 1000) -> int:
+        """Write records in batches; returns number of records written."""
+        batch: List[Record] = []
+        count = 0
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._write_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+            count += len(batch)
+        return count
+
+    def search(self, inn: str, page: int = 1, per_page: int = 10,
+               kind: Optional[str] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """Get (total, page of documents) for INN, newest first."""
+        kind_filter = " AND p.kind = ?" if kind else ""
+        params: List[Any] = [inn] + ([kind] if kind else [])
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(DISTINCT r.doc_id) FROM procurement_parties r "
+                f"JOIN procurements p ON p.id = r.doc_id WHERE r.inn = ?{kind_filter}",
+                params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT p.kind, p.number, p.date, p.sum, p.status, p.subject, p.customer_name, "
+                "GROUP_CONCAT(r.role) FROM procurement_parties r "
+                f"JOIN procurements p ON p.id = r.doc_id WHERE r.inn = ?{kind_filter} "
+                "GROUP BY r.date, r.doc_id ORDER BY r.date DESC, r.doc_id DESC LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+
+        columns = ('kind', 'number', 'date', 'sum', 'status', 'subject', 'customer_name', 'roles')
+        items = [dict(zip(columns, row)) for row in rows]
+        for item in items:
+            item['roles'] = sorted(set(item['roles'].split(',')))
+        return total, items
+
+    def count_documents(self) -> int:
+        """Number of indexed documents (full scan, for reports)."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM procurements").fetchone()[0]
+
+    def close(self):
+        """Close database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,97 @@
+"""Compact per-screen company payloads for Assistant prompts."""
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Fields of normalized company data each screen needs (dotted paths)
+SCREEN_FIELDS: Dict[str, List[str]] = {
+    'brief': [
+        'name.full', 'name.short', 'inn', 'ogrn', 'kpp', 'opf', 'type',
+        'state.status', 'state.registration_date', 'management',
+        'address.value', 'capital.value', 'okved', 'employees',
+    ],
+    'finances': ['name.short', 'inn', 'capital', 'finance'],
+    'requisites': ['name', 'inn', 'ogrn', 'kpp', 'opf', 'state'],
+    'address': ['name.short', 'inn', 'address'],
+    'directors': ['name.short', 'inn', 'management'],
+    'founders': ['name.short', 'inn', 'founders'],
+    'addresses_history': ['name.short', 'inn', 'address'],
+    'okved': ['name.short', 'inn', 'okved', 'okved_type', 'okveds'],
+}
+
+
+def _slim_founder(founder: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: founder[key] for key in ('name', 'inn', 'type', 'share') if founder.get(key) is not None}
+
+
+def _slim_okved(okved: Any) -> Any:
+    if isinstance(okved, dict):
+        return {key: okved[key] for key in ('code', 'name', 'main') if key in okved}
+    return okved
+
+
+# Reduce list entries that carry the full DaData objects
+FIELD_SLIMMERS: Dict[str, Callable[[Any], Any]] = {
+    'founders': lambda founders: [_slim_founder(f) for f in founders if isinstance(f, dict)],
+    'okveds': lambda okveds: [_slim_okved(o) for o in okveds],
+}
+
+
+def _get_path(data: Dict[str, Any], path: str) -> Any:
+    value: Any = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _set_path(target: Dict[str, Any], path: str, value: Any):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def select_screen_fields(screen_type: Optional[str], company_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Select fields of normalized company data needed for a screen.
+
+    Unknown screen types get all normalized fields; the raw DaData
+    response is never included.
+    """
+    data = company_data.get('data', {})
+    fields = SCREEN_FIELDS.get(screen_type)
+    if fields is None:
+        selected = dict(data)
+    else:
+        selected = {}
+        for path in fields:
+            value = _get_path(data, path)
+            if value is not None:
+                _set_path(selected, path, value)
+
+    for key, slim in FIELD_SLIMMERS.items():
+        if isinstance(selected.get(key), list):
+            selected[key] = slim(selected[key])
+
+    return selected
+
+
+def build_screen_payload(screen_type: Optional[str], company_data: Dict[str, Any]) -> str:
+    """Serialize screen fields as minified JSON."""
+    return json.dumps(
+        select_screen_fields(screen_type, company_data),
+        ensure_ascii=False,
+        separators=(',', ':'),
+        default=str
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for prompt text.
+
+    BPE tokenizers average about four bytes of UTF-8 per token on mixed
+    Russian/JSON text; exact counts come from run usage.
+    """
+    return max(1, len(text.encode('utf-8')) // 4)
@@ -0,0 +1,138 @@
+"""Token-bucket rate limiting per user and globally."""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from config import config
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Refill and take `cost` from every bucket, or from none of them.
+# KEYS: bucket keys; ARGV: cost, then rate and burst for each key.
+# Returns {1, '0'} when allowed, {0, seconds_to_wait} otherwise.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < cost then
+        return {0, tostring((cost - tokens) / rate)}
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {1, '0'}
+"""
+
+# Buckets: (name, rate in tokens per second, burst capacity)
+Bucket = Tuple[str, float, float]
+
+
+class RateLimiter:
+    """
+    Per-user and global token buckets.
+
+    Each request takes `cost` tokens from the user's bucket and the
+    global bucket. With Redis configured the buckets are shared across
+    instances; otherwise (or when Redis fails) in-process buckets are
+    used.
+    """
+
+    def __init__(self, user_rate: float, user_burst: float,
+                 global_rate: float, global_burst: float, max_users: int = 10000):
+        """Initialize limiter."""
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_users = max_users
+        self._buckets: OrderedDict = OrderedDict()
+
+        self.stats = {
+            'allowed': 0,
+            'limited': 0,
+            'redis_errors': 0,
+        }
+
+    def _get_buckets(self, user_id: Optional[int]) -> List[Bucket]:
+        buckets = [('global', self.global_rate, self.global_burst)]
+        if user_id is not None:
+            buckets.append((f"user:{user_id}", self.user_rate, self.user_burst))
+        return buckets
+
+    def _take_local(self, buckets: List[Bucket], cost: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        levels = []
+        for name, rate, burst in buckets:
+            tokens, updated_at = self._buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens < cost:
+                return False, (cost - tokens) / rate
+            levels.append(tokens)
+
+        for (name, _, _), tokens in zip(buckets, levels):
+            self._buckets[name] = (tokens - cost, now)
+            self._buckets.move_to_end(name)
+        while len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+        return True, 0.0
+
+    async def _take_redis(self, redis, buckets: List[Bucket], cost: float) -> Tuple[bool, float]:
+        args: List[Any] = [cost]
+        for _, rate, burst in buckets:
+            args.extend([rate, burst])
+        allowed, retry_after = await redis.eval(
+            _TAKE_SCRIPT, len(buckets), *(f"ratelimit:{name}" for name, _, _ in buckets), *args
+        )
+        return bool(allowed), float(retry_after)
+
+    async def acquire(self, user_id: Optional[int], cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens for user.
+
+        Returns:
+            (allowed, seconds until enough tokens are available)
+        """
+        buckets = self._get_buckets(user_id)
+        # A cost above capacity could never be paid
+        cost = min(cost, *(burst for _, _, burst in buckets))
+
+        redis = get_redis()
+        result = None
+        if redis is not None:
+            try:
+                result = await self._take_redis(redis, buckets, cost)
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.warning(f"Redis rate limit failed, using local buckets: {e}")
+        if result is None:
+            result = self._take_local(buckets, cost)
+
+        self.stats['allowed' if result[0] else 'limited'] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter counters."""
+        return {**self.stats, 'local_buckets': len(self._buckets)}
+
+
+# Global limiter instance
+rate_limiter = RateLimiter(
+    user_rate=config.RATE_LIMIT_USER_RATE,
+    user_burst=config.RATE_LIMIT_USER_BURST,
+    global_rate=config.RATE_LIMIT_GLOBAL_RATE,
+    global_burst=config.RATE_LIMIT_GLOBAL_BURST
+)
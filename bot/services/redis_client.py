@@ -0,0 +1,61 @@
+"""Shared Redis connection for cross-instance state."""
+import asyncio
+import logging
+from typing import Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_import_failed = False
+
+
+def get_redis():
+    """
+    Get async Redis client bound to the current event loop.
+
+    Returns None when REDIS_URL is not configured or the redis package
+    is not installed, so callers can fall back to in-process state.
+    """
+    global _client, _client_loop, _import_failed
+
+    if not config.REDIS_URL or _import_failed:
+        return None
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if _client is None or _client_loop is not loop:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("REDIS_URL is set but redis package is not installed")
+            _import_failed = True
+            return None
+
+        # Connections are tied to the loop they were opened in
+        _client = redis.from_url(
+            config.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=config.REDIS_TIMEOUT,
+            socket_connect_timeout=config.REDIS_TIMEOUT
+        )
+        _client_loop = loop
+
+    return _client
+
+
+async def close_redis():
+    """Close shared Redis client."""
+    global _client, _client_loop
+
+    if _client is not None:
+        try:
+            await _client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Redis client: {e}")
+    _client = None
+    _client_loop = None
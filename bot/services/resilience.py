@@ -0,0 +1,268 @@
+"""Circuit breakers, budgeted retries and hedged requests for upstream calls."""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class UpstreamUnavailable(Exception):
+    """Upstream is failing or its circuit is open; the call was not answered."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} unavailable: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+def is_transient_http_error(e: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx responses of aiohttp requests."""
+    import aiohttp
+
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status == 429 or e.status >= 500
+    return isinstance(e, (asyncio.TimeoutError, aiohttp.ClientError))
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream after consecutive failures.
+
+    After `failure_threshold` failures in a row the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then a single probe is
+    let through (half-open): its success closes the circuit, its failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize breaker."""
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == CLOSED
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """Give up a probe slot without a result (cancelled call)."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries (and hedges) to a share of requests.
+
+    Each first attempt deposits `ratio` tokens and each retry spends one,
+    so during an outage retries add at most `ratio` extra load instead
+    of multiplying it. `reserve` tokens are available from the start.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        """Initialize budget."""
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+    def deposit(self):
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Upstream:
+    """
+    One outbound dependency: breaker, retries with full jitter, hedging.
+
+    Only exceptions accepted by `retryable` count as upstream failures;
+    others (bad requests) propagate unchanged and leave the breaker as
+    is. When `hedge_percentile` is set, a second identical request is
+    started if the first one is slower than that percentile of recent
+    latencies; the first answer wins. Retries and hedges share the
+    global retry budget.
+    """
+
+    def __init__(self, name: str, budget: RetryBudget, attempts: int = 2, backoff: float = 0.2,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 hedge_percentile: Optional[float] = None,
+                 retryable: Callable[[BaseException], bool] = lambda e: True):
+        """Initialize upstream."""
+        self.name = name
+        self.budget = budget
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.hedge_percentile = hedge_percentile
+        self.retryable = retryable
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._latencies: deque = deque(maxlen=200)
+        self.stats = {
+            'calls': 0,
+            'failures': 0,
+            'retries': 0,
+            'hedges': 0,
+            'hedge_wins': 0,
+            'rejected': 0,
+            'budget_exhausted': 0,
+        }
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency percentile (seconds) of recent successful attempts."""
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    async def _timed(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await fn()
+        self._latencies.append(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]], hedge: bool) -> Any:
+        delay = self.percentile(self.hedge_percentile) if hedge and self.hedge_percentile else None
+        if delay is None:
+            return await self._timed(fn)
+
+        primary = asyncio.ensure_future(self._timed(fn))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.budget.withdraw():
+                self.stats['hedges'] += 1
+                tasks.add(asyncio.ensure_future(self._timed(fn)))
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    if not tasks:
+                        raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], attempts: Optional[int] = None,
+                   hedge: bool = True) -> Any:
+        """
+        Call `fn` through the breaker with retries (and hedging).
+
+        Raises:
+            UpstreamUnavailable: circuit is open or all attempts failed
+        """
+        attempts = self.attempts if attempts is None else max(1, attempts)
+        self.stats['calls'] += 1
+        self.budget.deposit()
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self.stats['rejected'] += 1
+                raise UpstreamUnavailable(self.name, 'circuit open')
+            try:
+                result = await self._attempt(fn, hedge)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not self.retryable(e):
+                    # Says nothing about upstream health: free a probe slot only
+                    self.breaker.release()
+                    raise
+                self.stats['failures'] += 1
+                self.breaker.record_failure()
+                logger.warning(f"{self.name} attempt {attempt + 1}/{attempts} failed: {e!r}")
+                if attempt + 1 >= attempts:
+                    raise UpstreamUnavailable(self.name, repr(e)) from e
+                if not self.budget.withdraw():
+                    self.stats['budget_exhausted'] += 1
+                    raise UpstreamUnavailable(self.name, 'retry budget exhausted') from e
+                self.stats['retries'] += 1
+                # Full jitter keeps retrying clients from synchronizing
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """Breaker state, counters and latency percentiles."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            **self.stats,
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# Shared by all upstreams, so an outage of one cannot turn into a retry storm
+retry_budget = RetryBudget(ratio=config.RETRY_BUDGET_RATIO, reserve=config.RETRY_BUDGET_RESERVE)
+_upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str, **kwargs) -> Upstream:
+    """Get upstream by name, creating it with configured defaults on first use."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        options = {
+            'attempts': config.UPSTREAM_ATTEMPTS,
+            'backoff': config.UPSTREAM_RETRY_BACKOFF,
+            'failure_threshold': config.BREAKER_FAILURE_THRESHOLD,
+            'reset_timeout': config.BREAKER_RESET_TIMEOUT,
+            **kwargs,
+        }
+        upstream = _upstreams[name] = Upstream(name, retry_budget, **options)
+    return upstream
+
+
+def health_status() -> Dict[str, Any]:
+    """Liveness payload fields: 'degraded' while any circuit is not closed."""
+    states = {name: upstream.breaker.state for name, upstream in _upstreams.items()}
+    return {
+        'status': 'degraded' if any(state != CLOSED for state in states.values()) else 'ok',
+        'upstreams': states,
+    }
+
+
+def upstream_status() -> Dict[str, Any]:
+    """Detailed status of upstreams and the retry budget."""
+    return {
+        'retry_budget': round(retry_budget.tokens, 2),
+        'upstreams': {name: upstream.get_status() for name, upstream in _upstreams.items()},
+    }
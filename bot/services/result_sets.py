@@ -0,0 +1,62 @@
+"""Short-lived full result lists for paginated screens."""
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+from config import config
+from bot.services.cache import TwoTierCache
+from bot.services.singleflight import create_single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def page_slice(items: List[Any], page: int, per_page: int) -> List[Any]:
+    """Items of 1-based `page`."""
+    start = (page - 1) * per_page
+    return items[start:start + per_page]
+
+
+class ResultSetCache:
+    """
+    Cache whole result lists per source and INN for a short time.
+
+    The first page of a search fetches the complete list once; turning
+    pages slices the cached list instead of querying the source again.
+    Concurrent first requests share one fetch. Results with an `error`
+    are not cached.
+    """
+
+    def __init__(self, ttl: int, max_items: int = 256):
+        """Initialize cache."""
+        self.cache = TwoTierCache('results', ttl=ttl, max_items=max_items)
+        self._flight = create_single_flight('results')
+        self.stats = {
+            'fetches': 0,
+        }
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        self.stats['fetches'] += 1
+        result = await fetch()
+        if not result.get('error'):
+            await self.cache.set(key, result)
+        return result
+
+    async def get(self, source: str, inn: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                  background: bool = False) -> Dict[str, Any]:
+        """
+        Get result set from cache, fetching it on miss.
+
+        A cancelled `background` caller (prefetch) also cancels the fetch
+        unless a user request is waiting for it.
+        """
+        key = f"{source}:{inn}"
+        cached, _ = await self.cache.get(key)
+        if cached is not None:
+            return cached
+        return await self._flight.do(key, lambda: self._fetch_and_store(key, fetch), cancel_abandoned=background)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fetch and cache counters."""
+        return {**self.stats, 'cache': self.cache.get_stats()}
+
+
+# Global cache instance
+result_sets = ResultSetCache(ttl=config.RESULT_SET_TTL, max_items=config.RESULT_SET_MAX_ITEMS)
@@ -0,0 +1,142 @@
+"""Single-flight coalescing of concurrent identical requests."""
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import config
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Delete lock only if it is still owned by the caller
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Run at most one in-flight call per key.
+
+    Concurrent callers with the same key await the same task. When
+    `distributed` is enabled and a `recheck` callable is given, a Redis
+    lock extends coalescing across processes: callers that lose the lock
+    poll `recheck` (usually a cache read) until the holder publishes a
+    result or releases the lock.
+    """
+
+    def __init__(self, namespace: str, distributed: bool = False,
+                 lock_ttl: float = 10.0, poll_interval: float = 0.1):
+        """Initialize single-flight group."""
+        self.namespace = namespace
+        self.distributed = distributed
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+        self.stats = {
+            'calls': 0,
+            'coalesced': 0,
+            'lock_acquired': 0,
+            'lock_waits': 0,
+            'lock_errors': 0,
+            'abandoned': 0,
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 recheck: Optional[Callable[[], Awaitable[Any]]] = None,
+                 cancel_abandoned: bool = False) -> Any:
+        """
+        Execute `fn` once for all concurrent callers of `key`.
+
+        The shared call runs as a separate task, so a cancelled caller
+        does not cancel the fetch for everyone else. Callers passing
+        `cancel_abandoned` (background work) cancel the shared call when
+        they are cancelled and nobody else is waiting for it.
+        """
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['calls'] += 1
+            task = asyncio.ensure_future(self._run(key, fn, recheck))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if cancel_abandoned and self._waiters[key] == 1 and self._inflight.get(key) is task:
+                self.stats['abandoned'] += 1
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]],
+                   recheck: Optional[Callable[[], Awaitable[Any]]]) -> Any:
+        redis = get_redis() if self.distributed and recheck is not None else None
+        if redis is None:
+            return await fn()
+
+        lock_key = f"lock:{self.namespace}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            self.stats['lock_errors'] += 1
+            logger.warning(f"Redis lock failed for {lock_key}: {e}")
+            return await fn()
+
+        if acquired:
+            self.stats['lock_acquired'] += 1
+            try:
+                return await fn()
+            finally:
+                try:
+                    await redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    self.stats['lock_errors'] += 1
+                    logger.warning(f"Redis unlock failed for {lock_key}: {e}")
+
+        # Another process is fetching the same key: wait for its result
+        self.stats['lock_waits'] += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+        try:
+            while loop.time() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                result = await recheck()
+                if result is not None:
+                    return result
+                if not await redis.exists(lock_key):
+                    break
+        except Exception as e:
+            self.stats['lock_errors'] += 1
+            logger.warning(f"Redis lock wait failed for {lock_key}: {e}")
+
+        return await fn()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters."""
+        return {**self.stats, 'inflight': len(self._inflight)}
+
+
+def create_single_flight(namespace: str, distributed: bool = False) -> SingleFlight:
+    """Create single-flight group using configured lock settings."""
+    return SingleFlight(
+        namespace,
+        distributed=distributed and config.SINGLEFLIGHT_REDIS_LOCK,
+        lock_ttl=config.SINGLEFLIGHT_LOCK_TTL
+    )
@@ -0,0 +1,71 @@
+"""Default sudrf.ru court sites per INN region code."""
+from typing import Dict, List
+
+# District (city) courts: they hear first-instance civil cases, which is
+# what the court crawler searches (g1_case). A company is searched in all
+# district courts of its region at once. Regions not listed here, or
+# other courts, are configured with SUDRF_HOSTS.
+REGION_HOSTS: Dict[str, List[str]] = {
+    # Moscow. The courts also publish cases on mos-gorsud.ru; their
+    # sudrf.ru sites answer the same search form.
+    '77': [
+        'babushkinsky--msk.sudrf.ru',
+        'basmanny--msk.sudrf.ru',
+        'butyrsky--msk.sudrf.ru',
+        'gagarinsky--msk.sudrf.ru',
+        'golovinsky--msk.sudrf.ru',
+        'dorogomilovsky--msk.sudrf.ru',
+        'zamoskvoretsky--msk.sudrf.ru',
+        'zelenogradsky--msk.sudrf.ru',
+        'zuzinsky--msk.sudrf.ru',
+        'izmailovsky--msk.sudrf.ru',
+        'koptevsky--msk.sudrf.ru',
+        'kuzminsky--msk.sudrf.ru',
+        'kuntsevsky--msk.sudrf.ru',
+        'lefortovsky--msk.sudrf.ru',
+        'lublinsky--msk.sudrf.ru',
+        'meshchansky--msk.sudrf.ru',
+        'nagatinsky--msk.sudrf.ru',
+        'nikulinsky--msk.sudrf.ru',
+        'ostankinsky--msk.sudrf.ru',
+        'perovsky--msk.sudrf.ru',
+        'preobrazhensky--msk.sudrf.ru',
+        'presnensky--msk.sudrf.ru',
+        'savyolovsky--msk.sudrf.ru',
+        'simonovsky--msk.sudrf.ru',
+        'solntsevsky--msk.sudrf.ru',
+        'tagansky--msk.sudrf.ru',
+        'tverskoy--msk.sudrf.ru',
+        'timiryazevsky--msk.sudrf.ru',
+        'troitsky--msk.sudrf.ru',
+        'tushinsky--msk.sudrf.ru',
+        'khamovnichesky--msk.sudrf.ru',
+        'khoroshevsky--msk.sudrf.ru',
+        'cheremushkinsky--msk.sudrf.ru',
+        'chertanovsky--msk.sudrf.ru',
+        'shcherbinsky--msk.sudrf.ru',
+    ],
+    # Saint Petersburg
+    '78': [
+        'vo--spb.sudrf.ru',
+        'vbr--spb.sudrf.ru',
+        'dzr--spb.sudrf.ru',
+        'kln--spb.sudrf.ru',
+        'krv--spb.sudrf.ru',
+        'kpn--spb.sudrf.ru',
+        'krg--spb.sudrf.ru',
+        'krs--spb.sudrf.ru',
+        'kronshtadt--spb.sudrf.ru',
+        'kbr--spb.sudrf.ru',
+        'msk--spb.sudrf.ru',
+        'nvs--spb.sudrf.ru',
+        'oktibrsky--spb.sudrf.ru',
+        'pst--spb.sudrf.ru',
+        'ptr--spb.sudrf.ru',
+        'prm--spb.sudrf.ru',
+        'psh--spb.sudrf.ru',
+        'sst--spb.sudrf.ru',
+        'smolninsky--spb.sudrf.ru',
+        'frn--spb.sudrf.ru',
+    ],
+}
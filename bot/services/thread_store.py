@@ -0,0 +1,161 @@
+"""Persistent registry of OpenAI Assistant threads per user."""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config import config
+from bot.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadStore(ABC):
+    """
+    Base thread store.
+
+    Records are dicts with thread_id, messages (queries sent to the
+    thread) and created_at. Records expire `ttl` seconds after the last
+    update.
+    """
+
+    def __init__(self, ttl: int):
+        """Initialize store."""
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get thread record for user."""
+
+    @abstractmethod
+    async def set(self, user_id: int, record: Dict[str, Any]):
+        """Save thread record for user."""
+
+    @abstractmethod
+    async def delete(self, user_id: int):
+        """Remove thread record for user."""
+
+
+class MemoryThreadStore(ThreadStore):
+    """In-process LRU thread store."""
+
+    def __init__(self, ttl: int, max_items: int = 10000):
+        """Initialize store."""
+        super().__init__(ttl)
+        self.max_items = max_items
+        self._records: OrderedDict = OrderedDict()
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._records.get(user_id)
+        if entry is None:
+            return None
+        record, updated_at = entry
+        if time.time() - updated_at > self.ttl:
+            del self._records[user_id]
+            return None
+        self._records.move_to_end(user_id)
+        return dict(record)
+
+    async def set(self, user_id: int, record: Dict[str, Any]):
+        self._records[user_id] = (dict(record), time.time())
+        self._records.move_to_end(user_id)
+        while len(self._records) > self.max_items:
+            self._records.popitem(last=False)
+
+    async def delete(self, user_id: int):
+        self._records.pop(user_id, None)
+
+
+class RedisThreadStore(ThreadStore):
+    """Redis thread store shared across instances."""
+
+    def _key(self, user_id: int) -> str:
+        return f"assistant:thread:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        raw = await redis.get(self._key(user_id))
+        return json.loads(raw) if raw else None
+
+    async def set(self, user_id: int, record: Dict[str, Any]):
+        redis = get_redis()
+        if redis is not None:
+            await redis.set(self._key(user_id), json.dumps(record), ex=self.ttl)
+
+    async def delete(self, user_id: int):
+        redis = get_redis()
+        if redis is not None:
+            await redis.delete(self._key(user_id))
+
+
+class SQLiteThreadStore(ThreadStore):
+    """SQLite thread store for single-host deployments."""
+
+    def __init__(self, ttl: int, path: str):
+        """Initialize store and create schema."""
+        super().__init__(ttl)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS assistant_threads ("
+                "user_id INTEGER PRIMARY KEY, record TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM assistant_threads WHERE user_id = ? AND updated_at > ?",
+                (user_id, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, user_id: int, record: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assistant_threads (user_id, record, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(record), time.time())
+            )
+            self._conn.commit()
+
+    def _delete(self, user_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM assistant_threads WHERE user_id = ?", (user_id,))
+            self._conn.commit()
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, user_id)
+
+    async def set(self, user_id: int, record: Dict[str, Any]):
+        await asyncio.to_thread(self._set, user_id, record)
+
+    async def delete(self, user_id: int):
+        await asyncio.to_thread(self._delete, user_id)
+
+
+def create_thread_store() -> ThreadStore:
+    """Create thread store for configured THREAD_STORE backend."""
+    backend = config.THREAD_STORE
+    ttl = config.THREAD_TTL
+
+    if backend == 'redis':
+        if config.REDIS_URL:
+            return RedisThreadStore(ttl)
+        logger.warning("THREAD_STORE=redis but REDIS_URL is not set, using in-memory store")
+    elif backend == 'sqlite':
+        return SQLiteThreadStore(ttl, config.SQLITE_PATH)
+    elif backend != 'memory':
+        logger.warning(f"Unknown THREAD_STORE '{backend}', using in-memory store")
+
+    return MemoryThreadStore(ttl)
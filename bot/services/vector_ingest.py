@@ -0,0 +1,139 @@
+"""Background batched ingestion into the OpenAI vector store."""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Separator between records inside one uploaded file
+RECORD_SEPARATOR = "\n\n---\n\n"
+
+
+class VectorStoreIngestor:
+    """
+    Buffer query/response records and upload them in batches.
+
+    Records are deduplicated by content hash and packed `batch_size`
+    per file. A flush uploads the files and attaches them to the vector
+    store with a single file batch. Flushes run in background tasks and
+    never block the caller.
+    """
+
+    def __init__(self, client, vector_store_id: str, batch_size: int = 50,
+                 flush_interval: float = 60.0, max_buffer: int = 1000, dedup_size: int = 10000):
+        """Initialize ingestor."""
+        self.client = client
+        self.vector_store_id = vector_store_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dedup_size = dedup_size
+
+        self._buffer: List[str] = []
+        self._seen: OrderedDict = OrderedDict()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._timer_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'submitted': 0,
+            'duplicates': 0,
+            'dropped': 0,
+            'uploaded_records': 0,
+            'uploaded_files': 0,
+            'flushes': 0,
+            'errors': 0,
+        }
+
+    def submit(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Queue record for ingestion.
+
+        Returns:
+            False if the record was a duplicate or ingestion is disabled
+        """
+        if not self.vector_store_id:
+            return False
+
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if digest in self._seen:
+            self._seen.move_to_end(digest)
+            self.stats['duplicates'] += 1
+            return False
+        self._seen[digest] = None
+        while len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+
+        if metadata:
+            header = ' '.join(f"{key}={value}" for key, value in metadata.items())
+            content = f"[{header}]\n{content}"
+        self._buffer.append(content)
+        self.stats['submitted'] += 1
+
+        # Keep memory bounded if uploads keep failing
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.stats['dropped'] += overflow
+
+        if len(self._buffer) >= self.batch_size:
+            self._schedule_flush()
+        elif self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.ensure_future(self._flush_later())
+
+        return True
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Upload all buffered records."""
+        while self._buffer:
+            records, self._buffer = self._buffer, []
+            try:
+                await self._upload(records)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error ingesting {len(records)} records into vector store: {e}")
+                return
+
+    async def _upload(self, records: List[str]):
+        file_ids = []
+        stamp = int(time.time())
+        for i in range(0, len(records), self.batch_size):
+            chunk = records[i:i + self.batch_size]
+            content = RECORD_SEPARATOR.join(chunk).encode('utf-8')
+            file = await self.client.files.create(
+                file=(f"bot-memory-{stamp}-{i // self.batch_size}.txt", content),
+                purpose='assistants'
+            )
+            file_ids.append(file.id)
+
+        await self.client.beta.vector_stores.file_batches.create(
+            vector_store_id=self.vector_store_id,
+            file_ids=file_ids
+        )
+
+        self.stats['flushes'] += 1
+        self.stats['uploaded_files'] += len(file_ids)
+        self.stats['uploaded_records'] += len(records)
+        logger.info(f"Ingested {len(records)} records in {len(file_ids)} file(s) into vector store")
+
+    async def close(self):
+        """Flush remaining records and stop timers."""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ingestion counters."""
+        return {**self.stats, 'buffered': len(self._buffer)}
@@ -1,5 +1,54 @@
 """Message formatting utilities for iOS-style display."""
-from typing import Dict, Any, List
+import html
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Callable
+
+
+NO_DATA = 'нет данных'
+
+
+def _e(value: Any) -> str:
+    """Escape value for Telegram HTML parse mode."""
+    if value is None or value == '':
+        return NO_DATA
+    return html.escape(str(value), quote=False)
+
+
+def _header(title: str) -> str:
+    return f"""┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
+┃ {title}
+┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛"""
+
+
+def _format_share(share: Any) -> str:
+    """Format founder share from DaData share object."""
+    if not isinstance(share, dict):
+        return _e(share)
+    value = share.get('value')
+    if value is None:
+        return ''
+    share_type = share.get('type')
+    if share_type == 'PERCENT':
+        return f"{value}%"
+    if share_type == 'FRACTION':
+        return f"{share.get('numerator', value)}/{share.get('denominator', '')}"
+    return _e(value)
+
+
+def _format_okved_item(okved: Any) -> str:
+    """Format OKVED entry from DaData okveds list."""
+    if isinstance(okved, dict):
+        code = okved.get('code', '')
+        name = okved.get('name', '')
+        return f"<code>{_e(code)}</code> {_e(name)}".strip()
+    return _e(okved)
+
+
+def format_date(value: Any) -> Any:
+    """Convert DaData millisecond timestamp to DD.MM.YYYY."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime('%d.%m.%Y')
+    return value
 
 
 def format_company_info(company_data: Dict[str, Any]) -> str:
@@ -11,67 +60,143 @@ def format_company_info(company_data: Dict[str, Any]) -> str:
     
     # Company name
     name = data.get('name', {})
-    full_name = name.get('full_with_opf', 'Н/Д')
-    short_name = name.get('short_with_opf', '')
+    full_name = name.get('full', NO_DATA)
+    short_name = name.get('short', '')
     
     # Basic info
-    inn = data.get('inn', 'Н/Д')
-    ogrn = data.get('ogrn', 'Н/Д')
-    kpp = data.get('kpp', 'Н/Д')
+    inn = data.get('inn', NO_DATA)
+    ogrn = data.get('ogrn', NO_DATA)
+    kpp = data.get('kpp', NO_DATA)
     
     # Status
     state = data.get('state', {})
-    status = state.get('status', 'Н/Д')
-    reg_date = state.get('registration_date', 'Н/Д')
+    status = state.get('status', NO_DATA)
+    reg_date = state.get('registration_date', NO_DATA)
     
     # Management
     management = data.get('management', {})
-    director = management.get('name', 'Н/Д')
+    director = management.get('name', NO_DATA)
     director_post = management.get('post', 'Руководитель')
     
     # Address
     address = data.get('address', {})
-    addr_value = address.get('value', 'Н/Д')
+    addr_value = address.get('value', NO_DATA)
     
     # Capital
     capital = data.get('capital', {})
-    capital_value = capital.get('value', 'Н/Д') if capital else 'Н/Д'
+    capital_value = capital.get('value', NO_DATA) if capital else NO_DATA
+    
+    show_short = short_name and short_name not in (full_name, NO_DATA)
     
     message = f"""
 ╔══════════════════════════════╗
     📊 ИНФОРМАЦИЯ О КОМПАНИИ
 ╚══════════════════════════════╝
 
-🏢 <b>{full_name}</b>
-{f'({short_name})' if short_name and short_name != full_name else ''}
+🏢 <b>{_e(full_name)}</b>
+{f'({_e(short_name)})' if show_short else ''}
 
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 📋 РЕКВИЗИТЫ
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('📋 РЕКВИЗИТЫ')}
 
-• ИНН: <code>{inn}</code>
-• ОГРН: <code>{ogrn}</code>
-• КПП: <code>{kpp}</code>
-• Статус: {status}
-• Дата регистрации: {reg_date}
+• ИНН: <code>{_e(inn)}</code>
+• ОГРН: <code>{_e(ogrn)}</code>
+• КПП: <code>{_e(kpp)}</code>
+• Статус: {_e(status)}
+• Дата регистрации: {_e(format_date(reg_date))}
 
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 👤 РУКОВОДСТВО
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('👤 РУКОВОДСТВО')}
 
-• {director_post}: {director}
+• {_e(director_post)}: {_e(director)}
 
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 📍 АДРЕС
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('📍 АДРЕС')}
 
-{addr_value}
+{_e(addr_value)}
 
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 💰 УСТАВНЫЙ КАПИТАЛ
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('💰 УСТАВНЫЙ КАПИТАЛ')}
+
+{_e(capital_value)}
+"""
+    
+    return message.strip()
+
+
+def format_requisites(company_data: Dict[str, Any]) -> str:
+    """Format company requisites."""
+    data = company_data.get('data', {})
+    state = data.get('state', {})
+    name = data.get('name', {})
+    
+    message = f"""
+{_header('📋 РЕКВИЗИТЫ')}
+
+🏢 <b>{_e(name.get('full', NO_DATA))}</b>
+
+• ИНН: <code>{_e(data.get('inn'))}</code>
+• ОГРН: <code>{_e(data.get('ogrn'))}</code>
+• КПП: <code>{_e(data.get('kpp'))}</code>
+• ОПФ: {_e(data.get('opf'))}
+• Наименование (лат.): {_e(name.get('latin'))}
+
+<b>Регистрация:</b>
+
+• Статус: {_e(state.get('status'))}
+• Дата регистрации: {_e(format_date(state.get('registration_date')))}
+• Дата ликвидации: {_e(format_date(state.get('liquidation_date')))}
+"""
+    
+    return message.strip()
 
-{capital_value}
+
+def format_finances(company_data: Dict[str, Any]) -> str:
+    """Format financial information."""
+    data = company_data.get('data', {})
+    capital = data.get('capital', {}) or {}
+    finance = data.get('finance', {}) or {}
+    
+    # Handler passes result of get_company_finances()
+    if 'available' in finance:
+        finance = finance.get('data', {}) if finance.get('available') else {'note': finance.get('note', NO_DATA)}
+    
+    message = f"""
+{_header('💰 ФИНАНСЫ')}
+
+<b>Уставный капитал:</b> {_e(capital.get('value'))}
+"""
+    
+    if 'note' in finance:
+        message += f"\n<i>{_e(finance['note'])}</i>"
+        return message.strip()
+    
+    labels = [
+        ('year', 'Отчётный год'),
+        ('tax_system', 'Система налогообложения'),
+        ('income', 'Доходы'),
+        ('revenue', 'Выручка'),
+        ('expense', 'Расходы'),
+        ('debt', 'Недоимки'),
+        ('penalty', 'Штрафы'),
+    ]
+    for key, label in labels:
+        if finance.get(key) is not None:
+            message += f"\n• {label}: {_e(finance[key])}"
+    
+    return message.strip()
+
+
+def format_address(company_data: Dict[str, Any]) -> str:
+    """Format address screen."""
+    data = company_data.get('data', {})
+    address = data.get('address', {})
+    
+    message = f"""
+{_header('📍 АДРЕС')}
+
+<b>Юридический адрес:</b>
+{_e(address.get('value'))}
+
+• Индекс: {_e(address.get('postal_code'))}
+• Регион: {_e(address.get('region'))}
+• Город: {_e(address.get('city'))}
 """
     
     return message.strip()
@@ -85,18 +210,16 @@ def format_directors(company_data: Dict[str, Any]) -> str:
     if not management:
         return "❌ Информация о руководителях отсутствует"
     
-    name = management.get('name', 'Н/Д')
-    post = management.get('post', 'Н/Д')
+    name = management.get('name', NO_DATA)
+    post = management.get('post', NO_DATA)
     
     message = f"""
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 👤 ДИРЕКТОРА
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('👤 ДИРЕКТОРА')}
 
 <b>Текущий руководитель:</b>
 
-• ФИО: {name}
-• Должность: {post}
+• ФИО: {_e(name)}
+• Должность: {_e(post)}
 
 <i>Примечание: История изменений руководителей требует расширенной подписки DaData</i>
 """
@@ -112,18 +235,18 @@ def format_founders(company_data: Dict[str, Any]) -> str:
     if not founders:
         return "❌ Информация об учредителях отсутствует"
     
-    message = """
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 👥 УЧРЕДИТЕЛИ
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+    message = f"""
+{_header('👥 УЧРЕДИТЕЛИ')}
 
 """
     
     for i, founder in enumerate(founders, 1):
-        name = founder.get('name', 'Н/Д')
-        share = founder.get('share', {})
+        name = founder.get('name') or founder.get('fio', {}).get('source') or NO_DATA
+        share = _format_share(founder.get('share'))
         
-        message += f"\n<b>{i}. {name}</b>\n"
+        message += f"\n<b>{i}. {_e(name)}</b>\n"
+        if founder.get('inn'):
+            message += f"   ИНН: <code>{_e(founder['inn'])}</code>\n"
         if share:
             message += f"   Доля: {share}\n"
     
@@ -138,22 +261,20 @@ def format_addresses(company_data: Dict[str, Any]) -> str:
     if not address:
         return "❌ Информация об адресах отсутствует"
     
-    addr_value = address.get('value', 'Н/Д')
-    addr_data = address.get('data', {})
+    addr_value = address.get('value', NO_DATA)
+    postal = address.get('postal_code', '')
     
     message = f"""
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 📍 АДРЕСА
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('📍 АДРЕСА')}
 
 <b>Юридический адрес:</b>
-{addr_value}
+{_e(addr_value)}
 """
     
-    if addr_data:
-        postal = addr_data.get('postal_code', '')
-        if postal:
-            message += f"\n<b>Индекс:</b> {postal}"
+    if postal and postal != NO_DATA:
+        message += f"\n<b>Индекс:</b> {_e(postal)}"
+    
+    message += "\n\n<i>Примечание: История изменений адресов требует расширенной подписки DaData</i>"
     
     return message.strip()
 
@@ -162,24 +283,22 @@ def format_okved(company_data: Dict[str, Any]) -> str:
     """Format OKVED information."""
     data = company_data.get('data', {})
     okved = data.get('okved', '')
-    okveds = data.get('okveds', [])
+    okveds = [okv for okv in data.get('okveds', []) if not (isinstance(okv, dict) and okv.get('main'))]
     
-    if not okved and not okveds:
+    if (not okved or okved == NO_DATA) and not okveds:
         return "❌ Информация об ОКВЭД отсутствует"
     
     message = f"""
-┏━━━━━━━━━━━━━━━━━━━━━━━━━━┓
-┃ 📊 ОКВЭД
-┗━━━━━━━━━━━━━━━━━━━━━━━━━━┛
+{_header('📊 ОКВЭД')}
 
 <b>Основной вид деятельности:</b>
-{okved}
+<code>{_e(okved)}</code>
 """
     
     if okveds:
         message += "\n\n<b>Дополнительные виды деятельности:</b>\n"
         for i, okv in enumerate(okveds[:10], 1):  # Limit to 10
-            message += f"\n{i}. {okv}"
+            message += f"\n{i}. {_format_okved_item(okv)}"
         
         if len(okveds) > 10:
             message += f"\n\n<i>... и еще {len(okveds) - 10} видов деятельности</i>"
@@ -187,6 +306,37 @@ def format_okved(company_data: Dict[str, Any]) -> str:
     return message.strip()
 
 
+# Local renderers for company screens (see render_screen)
+SCREEN_RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'brief': format_company_info,
+    'finances': format_finances,
+    'requisites': format_requisites,
+    'address': format_address,
+    'directors': format_directors,
+    'founders': format_founders,
+    'addresses_history': format_addresses,
+    'okved': format_okved,
+}
+
+
+def render_screen(screen_type: str, company_data: Dict[str, Any]) -> str:
+    """
+    Render company screen locally from normalized DaData data.
+    
+    Args:
+        screen_type: Type of screen (brief, finances, requisites, etc.)
+        company_data: Normalized company data from MCP DaData
+    
+    Returns:
+        Screen content in Telegram HTML
+    """
+    if not company_data:
+        return "❌ Компания не найдена"
+    
+    renderer = SCREEN_RENDERERS.get(screen_type, format_company_info)
+    return renderer(company_data)
+
+
 def format_court_cases(cases_data: Dict[str, Any], page: int = 1) -> str:
     """Format court cases information."""
     cases = cases_data.get('cases', [])
@@ -0,0 +1,100 @@
+"""Progressive message editing for streamed assistant output."""
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram message length limit (with room for the cursor)
+MAX_PREVIEW_LENGTH = 4000
+CURSOR = ' ▌'
+
+# Matches complete and trailing partial HTML tags
+_TAG_RE = re.compile(r'<[^>]*>?')
+
+
+class ProgressiveEditor:
+    """
+    Edit a Telegram message while assistant text is streaming in.
+
+    Intermediate edits are sent as plain text (partial HTML would be
+    rejected by Telegram) and coalesced to at most one per `interval`
+    seconds. They are sent by a single background task that always
+    takes the latest text, so the stream is never held up by Telegram
+    round trips or flood pacing. finish() sends the final HTML text
+    with the keyboard.
+    """
+
+    def __init__(self, edit: Callable[..., Awaitable], interval: float = 1.0):
+        """
+        Initialize editor.
+
+        Args:
+            edit: Bound edit coroutine, e.g. CallbackQuery.edit_message_text
+            interval: Minimum seconds between intermediate edits
+        """
+        self._edit = edit
+        self.interval = interval
+        self._next_edit_at = 0.0
+        self._last_preview: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sending = False
+        self._finished = False
+        self.edits = 0
+
+    async def update(self, text: str):
+        """Remember partial text for the background edit task; returns at once."""
+        if self._finished:
+            return
+        self._pending = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._send_pending())
+
+    async def _send_pending(self):
+        while self._pending is not None and not self._finished:
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            preview = _TAG_RE.sub('', self._pending).strip()[:MAX_PREVIEW_LENGTH]
+            self._pending = None
+            if not preview or preview == self._last_preview:
+                continue
+
+            self._next_edit_at = time.monotonic() + self.interval
+            self._last_preview = preview
+            self._sending = True
+            try:
+                await self._edit(preview + CURSOR)
+                self.edits += 1
+            except RetryAfter as e:
+                self._next_edit_at = time.monotonic() + e.retry_after
+                logger.debug(f"Progressive edit throttled by Telegram for {e.retry_after}s")
+            except BadRequest as e:
+                logger.debug(f"Progressive edit rejected: {e}")
+            except TelegramError as e:
+                logger.debug(f"Progressive edit failed: {e}")
+            finally:
+                self._sending = False
+
+    async def finish(self, text: str, reply_markup=None, parse_mode: str = 'HTML'):
+        """Send final text with keyboard, falling back to plain text on bad HTML."""
+        self._finished = True
+        if self._task is not None and not self._task.done():
+            if self._sending:
+                # An edit already sent must not land after the final text
+                await self._task
+            else:
+                self._task.cancel()
+        try:
+            await self._edit(text, parse_mode=parse_mode, reply_markup=reply_markup)
+        except BadRequest as e:
+            if 'not modified' in str(e).lower():
+                return
+            logger.warning(f"Final edit rejected ({e}), sending as plain text")
+            await self._edit(_TAG_RE.sub('', text), reply_markup=reply_markup)
@@ -11,16 +11,118 @@ class Config:
     # Telegram
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
     TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL', '')
+    # Checked against X-Telegram-Bot-Api-Secret-Token when set
+    TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET', '')
+    # Outgoing message limits (Bot API flood control)
+    TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+    TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+    TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '3'))
+    TELEGRAM_GROUP_RATE_PER_MINUTE = float(os.getenv('TELEGRAM_GROUP_RATE_PER_MINUTE', '20'))
+    TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))
     
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     OPENAI_ASSISTANT_ID = os.getenv('OPENAI_ASSISTANT_ID', '')
     OPENAI_VECTOR_STORE_ID = os.getenv('OPENAI_VECTOR_STORE_ID', '')
+    VECTOR_INGEST_BATCH_SIZE = int(os.getenv('VECTOR_INGEST_BATCH_SIZE', '50'))
+    VECTOR_INGEST_FLUSH_INTERVAL = float(os.getenv('VECTOR_INGEST_FLUSH_INTERVAL', '60'))
+    # Screens formatted by the Assistant (comma-separated); others render locally
+    ASSISTANT_SCREENS = [s.strip() for s in os.getenv('ASSISTANT_SCREENS', '').split(',') if s.strip()]
+    ASSISTANT_RUN_TIMEOUT = float(os.getenv('ASSISTANT_RUN_TIMEOUT', '30'))
+    ASSISTANT_POLL_INTERVAL = float(os.getenv('ASSISTANT_POLL_INTERVAL', '0.3'))
+    ASSISTANT_POLL_MAX_INTERVAL = float(os.getenv('ASSISTANT_POLL_MAX_INTERVAL', '2'))
+    STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '1'))
+    
+    # Assistant threads: memory, redis or sqlite
+    THREAD_STORE = os.getenv('THREAD_STORE', 'memory')
+    THREAD_TTL = int(os.getenv('THREAD_TTL', '86400'))
+    ASSISTANT_THREAD_MAX_MESSAGES = int(os.getenv('ASSISTANT_THREAD_MAX_MESSAGES', '20'))
     
     # MCP DaData
     MCP_DADATA_URL = os.getenv('MCP_DADATA_URL', 'https://mcp.dadata.ru/mcp')
     DADATA_API_KEY = os.getenv('DADATA_API_KEY', '')
     DADATA_SECRET_KEY = os.getenv('DADATA_SECRET_KEY', '')
+    DADATA_TIMEOUT = float(os.getenv('DADATA_TIMEOUT', '5'))
+    # Second DaData request when the first is slower than this latency percentile (0 disables)
+    DADATA_HEDGE_PERCENTILE = float(os.getenv('DADATA_HEDGE_PERCENTILE', '95'))
+    DADATA_POOL_SIZE = int(os.getenv('DADATA_POOL_SIZE', '20'))
+    DADATA_KEEPALIVE = float(os.getenv('DADATA_KEEPALIVE', '30'))
+    
+    # Cache
+    REDIS_URL = os.getenv('REDIS_URL', '')
+    REDIS_TIMEOUT = float(os.getenv('REDIS_TIMEOUT', '1'))
+    COMPANY_CACHE_TTL = int(os.getenv('COMPANY_CACHE_TTL', '3600'))
+    COMPANY_CACHE_STALE_TTL = int(os.getenv('COMPANY_CACHE_STALE_TTL', '21600'))
+    COMPANY_CACHE_MAX_ITEMS = int(os.getenv('COMPANY_CACHE_MAX_ITEMS', '1024'))
+    SINGLEFLIGHT_REDIS_LOCK = os.getenv('SINGLEFLIGHT_REDIS_LOCK', 'false').lower() == 'true'
+    SINGLEFLIGHT_LOCK_TTL = float(os.getenv('SINGLEFLIGHT_LOCK_TTL', '10'))
+    
+    # Upstream calls: attempts with jittered backoff, retries capped at
+    # RETRY_BUDGET_RATIO of requests; circuit opens after N failures in a row
+    UPSTREAM_ATTEMPTS = int(os.getenv('UPSTREAM_ATTEMPTS', '2'))
+    UPSTREAM_RETRY_BACKOFF = float(os.getenv('UPSTREAM_RETRY_BACKOFF', '0.2'))
+    RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.2'))
+    RETRY_BUDGET_RESERVE = float(os.getenv('RETRY_BUDGET_RESERVE', '10'))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+    BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+    
+    # Local storage
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/bot.sqlite3')
+    
+    # user_data (including search state): auto (Redis if configured, else SQLite),
+    # redis, sqlite or none
+    PERSISTENCE = os.getenv('PERSISTENCE', 'auto')
+    PERSISTENCE_FLUSH_INTERVAL = float(os.getenv('PERSISTENCE_FLUSH_INTERVAL', '2'))
+    PERSISTENCE_REFRESH_TTL = float(os.getenv('PERSISTENCE_REFRESH_TTL', '30'))
+    USER_DATA_TTL = int(os.getenv('USER_DATA_TTL', '604800'))
+    
+    # Webhook: sync processes updates before replying, queue acks first
+    WEBHOOK_MODE = os.getenv('WEBHOOK_MODE', 'sync')
+    WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '8'))
+    WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+    WEBHOOK_QUEUE_PUT_TIMEOUT = float(os.getenv('WEBHOOK_QUEUE_PUT_TIMEOUT', '1'))
+    # Background prefetch of court/procurement lists when a company card is
+    # opened; needs a long-running process, so on by default in queue mode
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true' if WEBHOOK_MODE == 'queue' else 'false').lower() == 'true'
+    PREFETCH_MAX_TASKS = int(os.getenv('PREFETCH_MAX_TASKS', '4'))
+    PREFETCH_MAX_LOAD = int(os.getenv('PREFETCH_MAX_LOAD', '8'))
+    # Recently seen update_ids kept to drop Telegram redeliveries
+    UPDATE_DEDUP_WINDOW = int(os.getenv('UPDATE_DEDUP_WINDOW', '10000'))
+    UPDATE_DEDUP_TTL = int(os.getenv('UPDATE_DEDUP_TTL', '3600'))
+    
+    # Rate limits: token buckets refilled at RATE tokens/s up to BURST
+    RATE_LIMIT_USER_RATE = float(os.getenv('RATE_LIMIT_USER_RATE', '0.5'))
+    RATE_LIMIT_USER_BURST = float(os.getenv('RATE_LIMIT_USER_BURST', '15'))
+    RATE_LIMIT_GLOBAL_RATE = float(os.getenv('RATE_LIMIT_GLOBAL_RATE', '50'))
+    RATE_LIMIT_GLOBAL_BURST = float(os.getenv('RATE_LIMIT_GLOBAL_BURST', '200'))
+    
+    # PDF export: render processes (0 renders in a thread), pending job limit
+    PDF_POOL_WORKERS = int(os.getenv('PDF_POOL_WORKERS', '2'))
+    PDF_POOL_QUEUE_SIZE = int(os.getenv('PDF_POOL_QUEUE_SIZE', '16'))
+    PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', '30'))
+    # Court cases (sudrf.ru): extra/override sites as `region=host,host;*=host`
+    SUDRF_HOSTS = os.getenv('SUDRF_HOSTS', '')
+    SUDRF_PER_HOST_CONCURRENCY = int(os.getenv('SUDRF_PER_HOST_CONCURRENCY', '2'))
+    SUDRF_REQUEST_TIMEOUT = float(os.getenv('SUDRF_REQUEST_TIMEOUT', '6'))
+    SUDRF_DEADLINE = float(os.getenv('SUDRF_DEADLINE', '8'))
+    COURT_CACHE_TTL = int(os.getenv('COURT_CACHE_TTL', '21600'))
+    COURT_CACHE_MAX_ITEMS = int(os.getenv('COURT_CACHE_MAX_ITEMS', '512'))
+    
+    # Full court/procurement lists kept for paging (rows capped per list)
+    RESULT_SET_TTL = int(os.getenv('RESULT_SET_TTL', '300'))
+    RESULT_SET_MAX_ITEMS = int(os.getenv('RESULT_SET_MAX_ITEMS', '256'))
+    RESULT_SET_MAX_ROWS = int(os.getenv('RESULT_SET_MAX_ROWS', '500'))
+    
+    # Procurement index built by ingest_procurement.py
+    PROCUREMENT_DB_PATH = os.getenv('PROCUREMENT_DB_PATH', 'data/procurement.sqlite3')
+    
+    # Telegram file_ids of sent PDFs, keyed by content hash
+    EXPORT_CACHE_TTL = int(os.getenv('EXPORT_CACHE_TTL', '86400'))
+    EXPORT_CACHE_MAX_ITEMS = int(os.getenv('EXPORT_CACHE_MAX_ITEMS', '4096'))
+    
+    # Standalone server (main.py)
+    HOST = os.getenv('HOST', '0.0.0.0')
+    PORT = int(os.getenv('PORT', '8080'))
     
     # Vercel
     VERCEL_ENV = os.getenv('VERCEL_ENV', 'development')
@@ -0,0 +1,52 @@
+"""
+Procurement index ingestion.
+
+Streams zakupki.gov.ru bulk XML dumps (zip archives or XML files with
+contracts and purchase notices) into the local SQLite index used by the
+bot's procurement screen. Dumps can be ingested repeatedly: newer
+versions of a document replace older ones.
+
+Usage:
+    python ingest_procurement.py [--db PATH] DUMP [DUMP ...]
+"""
+import argparse
+import logging
+import sys
+import time
+from config import config
+from bot.services.procurement_index import ProcurementIndex, iter_dump
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dumps', nargs='+', help='zip archives or XML files')
+    parser.add_argument('--db', default=config.PROCUREMENT_DB_PATH,
+                        help=f'index database (default: {config.PROCUREMENT_DB_PATH})')
+    parser.add_argument('--batch-size', type=int, default=1000, help='records per transaction')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    index = ProcurementIndex(args.db)
+    total = 0
+    failed = 0
+    started = time.perf_counter()
+    for path in args.dumps:
+        try:
+            count = index.ingest(iter_dump(path), batch_size=args.batch_size)
+        except Exception as e:
+            failed += 1
+            print(f"❌ {path}: {e}")
+            continue
+        total += count
+        print(f"✅ {path}: {count} records")
+
+    elapsed = time.perf_counter() - started
+    print()
+    print(f"Ingested {total} records in {elapsed:.1f}s, index has {index.count_documents()} documents")
+    index.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Standalone webhook server for Telegram bot.
+
+Serves the same Application as the Vercel function on an aiohttp server,
+so one process handles many webhook requests concurrently on a single
+event loop. Used by the Docker deployment.
+
+Routes:
+    POST /webhook, /api/webhook - Telegram updates
+    GET /health - liveness check
+    GET /metrics - runtime, queue and service stats
+"""
+import logging
+from aiohttp import web
+
+from config import config
+from bot.application import create_application
+from bot.metrics import collect_metrics
+from bot.services.resilience import health_status
+from bot.runtime import BotRuntime, parse_update, verify_secret_token
+
+# Configure logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=getattr(logging, config.LOG_LEVEL)
+)
+logger = logging.getLogger(__name__)
+
+RUNTIME = web.AppKey('runtime', BotRuntime)
+
+
+async def webhook(request: web.Request) -> web.Response:
+    """Handle Telegram update."""
+    if not verify_secret_token(request.headers.get('X-Telegram-Bot-Api-Secret-Token')):
+        logger.warning("Rejected webhook with invalid secret token")
+        return web.json_response({'ok': False, 'error': 'forbidden'}, status=403)
+
+    update_data = parse_update(await request.read())
+    if update_data is None:
+        return web.json_response({'ok': False, 'error': 'invalid update'}, status=400)
+
+    if not await request.app[RUNTIME].handle_update(update_data):
+        # Queue is full; Telegram redelivers the update later
+        return web.json_response({'ok': False, 'error': 'queue full'}, status=503)
+
+    return web.json_response({'ok': True})
+
+
+async def health(request: web.Request) -> web.Response:
+    """Health check."""
+    return web.json_response({
+        **health_status(),
+        'message': 'Telegram Bot Webhook is running',
+        'mode': config.WEBHOOK_MODE
+    })
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """Runtime metrics."""
+    return web.json_response(collect_metrics(request.app[RUNTIME]))
+
+
+async def _runtime_context(app: web.Application):
+    runtime = app[RUNTIME]
+    # Initialize before accepting traffic so the first update is not slowed down
+    await runtime.get_application()
+    yield
+    await runtime.close()
+
+
+def create_server() -> web.Application:
+    """Create aiohttp application with webhook, health and metrics routes."""
+    app = web.Application()
+    app[RUNTIME] = BotRuntime(create_application)
+    app.add_routes([
+        web.post('/webhook', webhook),
+        web.post('/api/webhook', webhook),
+        web.get('/health', health),
+        web.get('/metrics', metrics),
+    ])
+    app.cleanup_ctx.append(_runtime_context)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_server(), host=config.HOST, port=config.PORT)
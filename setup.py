@@ -99,7 +99,11 @@ def setup_webhook(webhook_url: str):
     url = f"https://api.telegram.org/bot{token}/setWebhook"
     
     try:
-        response = requests.post(url, json={"url": webhook_url})
+        payload = {"url": webhook_url}
+        if config.TELEGRAM_WEBHOOK_SECRET:
+            payload["secret_token"] = config.TELEGRAM_WEBHOOK_SECRET
+        
+        response = requests.post(url, json=payload)
         result = response.json()
         
         if result.get('ok'):
@@ -0,0 +1,90 @@
+"""Tests for the sudrf.ru court crawler fan-out."""
+import asyncio
+import time
+import pytest
+from bot.services import court
+from bot.services.court import CourtCasesService
+
+ROW = '<tr><td><a href="/case?id={number}">{number}</a></td><td>{date}</td><td>Иски</td><td>Судья</td><td></td><td>{status}</td></tr>'
+
+
+def _page(title, *cases):
+    rows = ''.join(ROW.format(**case) for case in cases)
+    return f'<html><head><title>{title}</title></head><body><table id="tablcont"><tr><th>№</th></tr>{rows}</table></body></html>'
+
+
+PAGES = {
+    'a--test.sudrf.ru': _page(
+        'Районный суд А',
+        {'number': '2-1/2024', 'date': '10.01.2024', 'status': 'Решено'},
+        # Same case listed twice by the site
+        {'number': '2-1/2024', 'date': '10.01.2024', 'status': 'Решено'},
+    ),
+    'b--test.sudrf.ru': _page(
+        'Районный суд Б',
+        {'number': '2-7/2024', 'date': '05.03.2024', 'status': ''},
+        {'number': '2-3/2023', 'date': '01.12.2023', 'status': 'Решено'},
+    ),
+    'c--test.sudrf.ru': _page(
+        'Районный суд В',
+        {'number': '2-9/2024', 'date': '20.02.2024', 'status': 'Решено'},
+    ),
+}
+
+
+@pytest.fixture
+def delays():
+    """Seconds each court site takes to answer."""
+    return {host: 0.2 for host in PAGES}
+
+
+@pytest.fixture
+def service(monkeypatch, delays):
+    service = CourtCasesService()
+    service.region_hosts = {'99': list(PAGES)}
+    service.deadline = 0.5
+
+    async def fetch_host(host, party):
+        await asyncio.sleep(delays[host])
+        return PAGES[host]
+
+    monkeypatch.setattr(service, '_fetch_host', fetch_host)
+    return service
+
+
+def test_default_map_has_district_courts():
+    assert len(court.REGION_HOSTS['77']) > 1
+    assert len(court.REGION_HOSTS['78']) > 1
+
+
+def test_region_hosts_searched_in_parallel_and_merged(service):
+    started = time.monotonic()
+    cases, complete = asyncio.run(service._crawl('9900000000', 'Ромашка'))
+    elapsed = time.monotonic() - started
+
+    # Three sites of 0.2 s each answer within one site's time
+    assert elapsed < 0.45
+    assert complete
+    assert [(case['court'], case['number']) for case in cases] == [
+        ('Районный суд Б', '2-7/2024'),
+        ('Районный суд В', '2-9/2024'),
+        ('Районный суд А', '2-1/2024'),
+        ('Районный суд Б', '2-3/2023'),
+    ]
+    assert cases[0]['status'] == 'В производстве'
+    assert cases[2]['url'] == 'https://a--test.sudrf.ru/case?id=2-1/2024'
+
+
+def test_site_missing_deadline_gives_partial_result(service, delays):
+    delays['c--test.sudrf.ru'] = 5
+
+    started = time.monotonic()
+    cases, complete = asyncio.run(service._crawl('9900000000', 'Ромашка'))
+
+    assert time.monotonic() - started < 1
+    assert not complete
+    assert [case['number'] for case in cases] == ['2-7/2024', '2-1/2024', '2-3/2023']
+
+
+def test_unnamed_company_is_not_searched(service):
+    assert asyncio.run(service._crawl('9900000000', None)) == ([], False)
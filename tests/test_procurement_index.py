@@ -0,0 +1,78 @@
+"""Tests for the local zakupki.gov.ru index."""
+import os
+import pytest
+from bot.services.procurement_index import ProcurementIndex, iter_dump
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'procurement_sample.zip')
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ProcurementIndex(str(tmp_path / 'procurement.sqlite3'))
+    yield index
+    index.close()
+
+
+def test_iter_dump_reads_contracts_and_notices():
+    records = list(iter_dump(SAMPLE))
+    assert [row[0] for row, _ in records] == [
+        'contract:3770708389324000001',
+        'contract:3500100000124000002',
+        'notice:0373100000124000003',
+    ]
+    assert records[0][0][-1] == 'procurement_sample.zip/contract_2024.xml'
+
+
+def test_ingest_and_search_by_inn(index):
+    assert index.ingest(iter_dump(SAMPLE)) == 3
+    assert index.count_documents() == 3
+
+    total, items = index.search('7707083893')
+    assert total == 3
+    # Newest first
+    assert [item['number'] for item in items] == [
+        '0373100000124000003',
+        '3500100000124000002',
+        '3770708389324000001',
+    ]
+    assert [item['roles'] for item in items] == [['placer'], ['supplier'], ['customer']]
+
+    notice, supplied, ordered = items
+    assert notice['kind'] == 'notice'
+    assert notice['sum'] == 50000.0
+    assert notice['customer_name'] == 'ГКУ «Архив»'
+    assert supplied['status'] == 'Исполнение завершено'
+    assert supplied['subject'] == 'Щебень'
+    assert ordered['subject'] == 'Ремонт моста & подъездных путей'
+    assert ordered['date'] == '2024-03-12'
+
+
+def test_search_by_kind_and_page(index):
+    index.ingest(iter_dump(SAMPLE))
+
+    total, items = index.search('7707083893', kind='contract')
+    assert total == 2
+    assert {item['kind'] for item in items} == {'contract'}
+
+    total, items = index.search('7707083893', page=2, per_page=2)
+    assert total == 3
+    assert [item['number'] for item in items] == ['3770708389324000001']
+
+
+def test_notice_customer_and_unknown_inn(index):
+    index.ingest(iter_dump(SAMPLE))
+
+    total, items = index.search('5003000003')
+    assert total == 1
+    assert items[0]['roles'] == ['customer']
+
+    assert index.search('0000000000') == (0, [])
+
+
+def test_reingest_replaces_documents(index):
+    index.ingest(iter_dump(SAMPLE))
+    index.ingest(iter_dump(SAMPLE), batch_size=1)
+
+    assert index.count_documents() == 3
+    total, _ = index.search('7707083893')
+    assert total == 3